@@ -1,12 +1,25 @@
 """FastAPI main application"""
+import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import playground, runs, tools
-from models.database import engine, Base, init_db
+from fastapi.responses import JSONResponse, PlainTextResponse
+from api.routes import playground, runs, tools, ingest, sessions
+from models.database import engine, Base, init_db, SessionLocal
+from core.llm_client import close_llm_clients
+from core.tool_registry import get_registry, start_tool_watcher
+from core.step_writer import close_step_writer
+from core.run_rollups import rebuild_rollups
+from core.metrics import render_metrics
+from core.run_queue import get_worker_pool
 
 # Create database tables
 init_db()
 
+# Opt-in knowledge base warmup; /health reports not-ready until it finishes
+PRELOAD_KB = os.getenv("KB_PRELOAD", "false").lower() in ("1", "true", "yes")
+warmup_state = {"ready": not PRELOAD_KB, "timings": None, "error": None}
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Agent Platform API",
@@ -27,12 +40,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Register route modules
 app.include_router(playground.router, prefix="/api", tags=["Playground"])
+app.include_router(sessions.router, prefix="/api", tags=["Sessions"])
 app.include_router(runs.router, prefix="/api", tags=["Runs"])
 app.include_router(tools.router, prefix="/api", tags=["Tools"])
+app.include_router(ingest.router, prefix="/api", tags=["Knowledge"])
+
+
+@app.on_event("startup")
+async def startup():
+    """Discover tools once so requests never pay for it"""
+    get_registry()
+    
+    # Backfill dashboard rollups for databases that predate them
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+    finally:
+        db.close()
+    
+    if PRELOAD_KB:
+        asyncio.create_task(warm_knowledge_base())
+    
+    # Opt-in: pick up new/edited files in tools/ without a restart
+    if os.getenv("TOOLS_HOT_RELOAD", "false").lower() in ("1", "true", "yes"):
+        start_tool_watcher()
+    
+    # Execute queued runs, including ones interrupted by the last shutdown
+    get_worker_pool().start()
+
+
+async def warm_knowledge_base():
+    """Load the embedding model and open Chroma off the event loop"""
+    from core.knowledge_base import get_kb
+    
+    try:
+        kb = await asyncio.to_thread(get_kb)
+        warmup_state["timings"] = await asyncio.to_thread(kb.warmup)
+        print(f"Knowledge Base warmed up: {warmup_state['timings']}")
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        print(f"Warning: Knowledge Base warmup failed: {e}")
+    finally:
+        warmup_state["ready"] = True
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop run workers, flush buffered run steps and release pooled LLM connections"""
+    await get_worker_pool().stop()
+    close_step_writer()
+    await close_llm_clients()
 
 
 @app.get("/")
@@ -48,11 +110,29 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring"""
-    return {
+    """Health check endpoint for monitoring (503 until warmup finishes)"""
+    if not warmup_state["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "api": "warming up"}
+        )
+    
+    body = {
         "status": "healthy",
         "api": "operational"
     }
+    if PRELOAD_KB:
+        body["knowledge_base"] = {
+            "timings": warmup_state["timings"],
+            "error": warmup_state["error"]
+        }
+    return body
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint (LLM/tool latency, tokens, iterations per run)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""Knowledge base ingestion job API routes"""
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from core.ingest_jobs import ingest_jobs, QueueFullError
+from core.knowledge_base import get_kb
+from tools.knowledge import queue_ingest
+
+router = APIRouter()
+
+
+class IngestRequest(BaseModel):
+    """Request model for submitting an ingestion job"""
+    path: str
+    kind: str = "file"  # file or directory (directory also accepts glob patterns)
+
+
+@router.post("/ingest/jobs", status_code=202)
+async def submit_ingest_job(request: IngestRequest):
+    """
+    Queue a file or directory for background ingestion.
+    
+    Returns:
+        dict: The queued job (poll /ingest/jobs/{id} for progress)
+    """
+    try:
+        job = queue_ingest(request.kind, request.path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return job.to_dict()
+
+
+@router.get("/ingest/jobs")
+async def list_ingest_jobs():
+    """
+    List recent ingestion jobs, newest first.
+    
+    Returns:
+        list: Job status dicts
+    """
+    return [job.to_dict() for job in ingest_jobs.list()]
+
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Get status and progress of an ingestion job.
+    
+    Args:
+        job_id: Job UUID
+        
+    Returns:
+        dict: Job status
+    """
+    job = ingest_jobs.get(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingestion job '{job_id}' not found")
+    
+    return job.to_dict()
+
+
+@router.get("/ingest/documents")
+def list_ingested_documents():
+    """
+    List ingested documents with their near-duplicate reports
+    (chunks checked/skipped, threshold, sample duplicates).
+    
+    Returns:
+        list: Per-document report dicts
+    """
+    return get_kb().dedup_reports()
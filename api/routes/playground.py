@@ -1,12 +1,19 @@
 """Playground API routes - chat endpoints"""
+import os
+import json
+import time
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from models.database import get_db
+from models.database import get_db, SessionLocal
+from api.sse import format_sse
 from models.run import Run
 from core.agent_engine import AgentEngine
 from core.run_tracker import RunTracker
-from core.tool_registry import ToolRegistry
+from core.tool_registry import get_registry
+from core.run_queue import get_run_queue, get_worker_pool
 
 router = APIRouter()
 
@@ -24,6 +31,32 @@ class ChatResponse(BaseModel):
     run_id: str
 
 
+class AsyncChatResponse(BaseModel):
+    """Response model for async chat endpoint"""
+    run_id: str
+    status: str
+
+
+class BatchChatItem(BaseModel):
+    """One prompt of a batch"""
+    message: str
+    id: str = None  # Optional client id echoed back in the result
+    model: str = None  # Overrides the batch model
+    tools: list[str] = None  # Overrides the batch tools
+
+
+class BatchChatRequest(BaseModel):
+    """Request model for batch chat endpoint"""
+    items: list[BatchChatItem]
+    model: str = None  # Default model for items
+    tools: list[str] = None  # Default allowed tools for items
+    concurrency: int = None  # Capped at BATCH_MAX_CONCURRENCY
+
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+
 from core.model_config import get_model_id, MODEL_MAPPINGS, DEFAULT_MODEL
 
 @router.get("/models")
@@ -40,14 +73,14 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
         ChatResponse with agent response and run ID
     """
     # Create run
-    run = Run(user_query=request.message, status="running")
+    run = Run(user_query=request.message, status="running", model=get_model_id(request.model))
     db.add(run)
     db.commit()
     db.refresh(run)
     
     # Initialize components
     tracker = RunTracker(run)
-    tool_registry = ToolRegistry()
+    tool_registry = get_registry()
     
     # Resolve model ID
     model_id = get_model_id(request.model) if request.model else None
@@ -59,16 +92,225 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
         response = await engine.run(request.message, allowed_tools=request.tools)
         
         # Finalize run
-        tracker.finalize("completed")
+        await tracker.finalize_async("completed")
         db.commit()
         
         return ChatResponse(response=response, run_id=run.id)
     
     except Exception as e:
         # Mark as failed and save
-        tracker.finalize("failed")
+        await tracker.finalize_async("failed")
         db.commit()
         raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+    
+    finally:
+        # Cancelled (client went away): still end live event streams
+        tracker.close()
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+    
+    Events:
+        run: {run_id} as soon as the run is created
+        token: {content} for each assistant text delta
+        step: a RunStep dict for every step recorded by RunTracker
+        done: {response, run_id} when the agent finishes
+        error: {detail, run_id} if the agent fails
+    """
+    tool_registry = get_registry()
+    model_id = get_model_id(request.model) if request.model else None
+    
+    async def event_stream():
+        # Everything the run owns is created here, not in the handler: if the
+        # client goes away before the body starts, the generator never runs
+        # and there is nothing to clean up. The stream outlives the request
+        # scope, so it owns its own session.
+        db = SessionLocal()
+        try:
+            run = Run(user_query=request.message, status="running", model=get_model_id(request.model))
+            db.add(run)
+            db.commit()
+            db.refresh(run)
+            
+            queue: asyncio.Queue = asyncio.Queue()
+            
+            tracker = RunTracker(run)
+            tracker.add_listener(lambda step: queue.put_nowait(("step", step)))
+            engine = AgentEngine(
+                tracker=tracker,
+                tool_registry=tool_registry,
+                model_id=model_id,
+                on_token=lambda token: queue.put_nowait(("token", {"content": token}))
+            )
+        except Exception:
+            db.close()
+            raise
+        
+        async def execute():
+            try:
+                response = await engine.run(request.message, allowed_tools=request.tools)
+                await tracker.finalize_async("completed")
+                db.commit()
+                queue.put_nowait(("done", {"response": response, "run_id": run.id}))
+            except Exception as e:
+                await tracker.finalize_async("failed")
+                db.commit()
+                queue.put_nowait(("error", {
+                    "detail": f"Agent execution failed: {str(e)}",
+                    "run_id": run.id
+                }))
+            finally:
+                queue.put_nowait(None)
+        
+        task = asyncio.create_task(execute())
+        try:
+            yield format_sse("run", {"run_id": run.id})
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                event, data = item
+                yield format_sse(event, data)
+        finally:
+            # Client disconnected early: stop the agent and release the session
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    await tracker.finalize_async("failed")
+                    db.commit()
+            tracker.close()
+            db.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/async", response_model=AsyncChatResponse, status_code=202)
+async def chat_async(request: ChatRequest, db: Session = Depends(get_db)):
+    """
+    Queue a chat for background execution and return immediately.
+    The run is executed by the worker pool; poll /runs/{run_id} for its
+    status and steps. Queued runs survive a server restart.
+
+    Returns:
+        AsyncChatResponse with the run ID and status "queued"
+    """
+    run = Run(user_query=request.message, status="queued", model=get_model_id(request.model))
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    payload = {
+        "message": request.message,
+        "model": get_model_id(request.model) if request.model else None,
+        "tools": request.tools
+    }
+    try:
+        await asyncio.to_thread(get_run_queue().enqueue, run.id, payload)
+    except Exception as e:
+        # Finalize through the tracker so the run is counted in the rollups
+        tracker = RunTracker(run)
+        tracker.add_step({'type': 'agent-response', 'content': f"Could not queue run: {str(e)}"})
+        await tracker.finalize_async("failed")
+        db.commit()
+        raise HTTPException(status_code=503, detail=f"Could not queue run: {str(e)}")
+
+    get_worker_pool().notify()
+    return AsyncChatResponse(run_id=run.id, status=run.status)
+
+
+@router.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Run many prompts concurrently (at most `concurrency` at a time) and
+    stream results as NDJSON in completion order. Every item is a normal
+    tracked Run.
+    
+    Lines:
+        {"index", "id", "run_id", "status": "completed", "response", "duration_ms"}
+        {"index", "id", "run_id", "status": "failed", "error", "duration_ms"}
+        {"done": true, "completed", "failed"} last
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="items must not be empty")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    
+    concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    tool_registry = get_registry()
+    
+    async def run_item(index: int, item: BatchChatItem) -> dict:
+        async with semaphore:
+            model_name = item.model or request.model
+            tools = item.tools if item.tools is not None else request.tools
+            started = time.perf_counter()
+            
+            # Items run concurrently, so each owns its session
+            db = SessionLocal()
+            try:
+                run = Run(user_query=item.message, status="running", model=get_model_id(model_name))
+                db.add(run)
+                db.commit()
+                db.refresh(run)
+                
+                tracker = RunTracker(run)
+                engine = AgentEngine(
+                    tracker=tracker,
+                    tool_registry=tool_registry,
+                    model_id=get_model_id(model_name) if model_name else None
+                )
+                result = {"index": index, "id": item.id, "run_id": run.id}
+                
+                try:
+                    response = await engine.run(item.message, allowed_tools=tools)
+                    await tracker.finalize_async("completed")
+                    db.commit()
+                    result.update(status="completed", response=response)
+                except asyncio.CancelledError:
+                    await tracker.finalize_async("failed")
+                    db.commit()
+                    raise
+                except Exception as e:
+                    await tracker.finalize_async("failed")
+                    db.commit()
+                    result.update(status="failed", error=f"Agent execution failed: {str(e)}")
+                finally:
+                    tracker.close()
+                
+                result["duration_ms"] = round((time.perf_counter() - started) * 1000)
+                return result
+            finally:
+                db.close()
+    
+    async def results():
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(request.items)]
+        counts = {"completed": 0, "failed": 0}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                counts[result["status"]] += 1
+                yield json.dumps(result) + "\n"
+            yield json.dumps({"done": True, **counts}) + "\n"
+        finally:
+            # Client disconnected: stop whatever hasn't finished
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    return StreamingResponse(
+        results(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/chat/status")
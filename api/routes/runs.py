@@ -1,30 +1,59 @@
 """Run history API routes"""
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import base64
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from models.database import get_db
-from models.run import Run
+from models.run import Run, RunStep
+from core.run_events import run_events
+from core.run_rollups import get_totals, get_series, record_run_deleted
+from api.sse import format_sse, SSE_KEEPALIVE
 
 router = APIRouter()
 
 
+def _encode_cursor(run: Run) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a run"""
+    raw = f"{run.created_at.isoformat()}|{run.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    """Inverse of _encode_cursor; raises HTTP 400 on malformed input"""
+    try:
+        created_at, run_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), run_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/runs")
 async def list_runs(
+    response: Response,
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    status: Optional[str] = Query(None, regex="^(running|completed|failed)$"),
+    cursor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, regex="^(queued|running|completed|failed)$"),
     db: Session = Depends(get_db)
 ):
     """
     Get list of runs for left sidebar in "Inspect Runs" page.
+    Reads only the runs table; step/tool counts and duration come from
+    summary columns filled in when a run is finalized.
     
     Query params:
     - limit: Max runs to return (1-100, default 50)
-    - offset: Pagination offset (default 0)
-    - status: Filter by status (running, completed, failed)
+    - offset: Pagination offset (default 0, ignored when cursor is given)
+    - cursor: Keyset cursor from the previous page's X-Next-Cursor header
+    - status: Filter by status (queued, running, completed, failed)
     
     Returns:
-        list: Run metadata for list display
+        list: Run metadata for list display. X-Next-Cursor header is set
+        when more runs may follow.
     """
     query = db.query(Run)
     
@@ -32,11 +61,24 @@ async def list_runs(
     if status:
         query = query.filter(Run.status == status)
     
-    # Order by most recent first
-    query = query.order_by(Run.created_at.desc())
+    # Keyset pagination: continue strictly after the cursor position
+    if cursor:
+        created_at, run_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Run.created_at < created_at,
+            and_(Run.created_at == created_at, Run.id < run_id)
+        ))
+    
+    # Order by most recent first (id breaks ties so pages are stable)
+    query = query.order_by(Run.created_at.desc(), Run.id.desc())
     
     # Apply pagination
-    runs = query.offset(offset).limit(limit).all()
+    if not cursor:
+        query = query.offset(offset)
+    runs = query.limit(limit).all()
+    
+    if len(runs) == limit and runs[-1].created_at:
+        response.headers["X-Next-Cursor"] = _encode_cursor(runs[-1])
     
     return [run.to_list_item() for run in runs]
 
@@ -61,6 +103,78 @@ async def get_run_details(run_id: str, db: Session = Depends(get_db)):
     return run.to_dict()
 
 
+@router.get("/runs/{run_id}/events")
+async def stream_run_events(
+    run_id: str,
+    after: int = Query(-1, description="Only send steps with order greater than this"),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events stream of a run's steps.
+    In-flight runs push each step the moment RunTracker records it;
+    finished runs replay their persisted steps. Either way the stream
+    ends with a single status event.
+    
+    Events:
+        step: a RunStep dict
+        status: {status, completed_at}
+    """
+    subscription = run_events.subscribe(run_id)
+    
+    if subscription is None:
+        # Not running in this process: replay what is in the DB
+        run = db.query(Run).filter(Run.id == run_id).first()
+        if not run:
+            raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
+        
+        steps = (
+            db.query(RunStep)
+            .filter(RunStep.run_id == run_id, RunStep.order > after)
+            .order_by(RunStep.order)
+            .all()
+        )
+        events = [("step", step.to_dict()) for step in steps]
+        events.append(("status", {
+            "status": run.status,
+            "completed_at": run.completed_at.isoformat() if run.completed_at else None
+        }))
+        
+        async def replay():
+            for event, data in events:
+                yield format_sse(event, data)
+        
+        stream = replay()
+    else:
+        backlog, queue = subscription
+        
+        async def live():
+            try:
+                for event, data in backlog:
+                    if event != "step" or data["order"] > after:
+                        yield format_sse(event, data)
+                
+                while True:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout=15)
+                    except asyncio.TimeoutError:
+                        yield SSE_KEEPALIVE
+                        continue
+                    if item is None:
+                        break
+                    event, data = item
+                    yield format_sse(event, data)
+            finally:
+                run_events.unsubscribe(run_id, queue)
+        
+        stream = live()
+    
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.delete("/runs/{run_id}")
 async def delete_run(run_id: str, db: Session = Depends(get_db)):
     """
@@ -78,6 +192,8 @@ async def delete_run(run_id: str, db: Session = Depends(get_db)):
     if not run:
         raise HTTPException(status_code=404, detail=f"Run '{run_id}' not found")
     
+    # Same transaction, so the stats never count a deleted run
+    record_run_deleted(db, run)
     db.delete(run)
     db.commit()
     
@@ -88,19 +204,47 @@ async def delete_run(run_id: str, db: Session = Depends(get_db)):
 async def get_run_stats(db: Session = Depends(get_db)):
     """
     Get summary statistics for runs.
+    Served from the all-time rollup rows, so cost does not grow with history.
     
     Returns:
         dict: Run statistics
     """
-    total_runs = db.query(Run).count()
-    completed = db.query(Run).filter(Run.status == "completed").count()
-    failed = db.query(Run).filter(Run.status == "failed").count()
-    running = db.query(Run).filter(Run.status == "running").count()
+    statuses = get_totals(db, "status")
     
     return {
-        "total": total_runs,
-        "completed": completed,
-        "failed": failed,
-        "running": running
+        "total": sum(statuses.values()),
+        "completed": statuses.get("completed", 0),
+        "failed": statuses.get("failed", 0),
+        "running": statuses.get("running", 0),
+        "models": get_totals(db, "model"),
+        "tools": get_totals(db, "tool")
     }
 
+
+@router.get("/runs/stats/timeseries")
+async def get_run_timeseries(
+    dimension: str = Query("status", regex="^(status|model|tool)$"),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    db: Session = Depends(get_db)
+):
+    """
+    Get hourly run counts for the dashboard trend charts.
+    
+    Query params:
+    - dimension: status, model or tool (default status)
+    - hours: How far back to look (1-2160, default 24)
+    
+    Returns:
+        dict: Buckets oldest first, each with counts per key
+    """
+    since = datetime.now() - timedelta(hours=hours - 1)
+    
+    buckets = {}
+    for row in get_series(db, dimension, since):
+        buckets.setdefault(row.bucket, {})[row.key] = row.count
+    
+    return {
+        "dimension": dimension,
+        "bucket_size": "hour",
+        "series": [{"bucket": bucket, "counts": counts} for bucket, counts in buckets.items()]
+    }
@@ -0,0 +1,155 @@
+"""Chat session API routes - multi-turn conversations kept server-side"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from models.database import get_db
+from models.run import Run
+from models.session import ChatSession, SessionMessage
+from core.agent_engine import AgentEngine
+from core.run_tracker import RunTracker
+from core.tool_registry import get_registry
+from core.model_config import get_model_id
+from core.sessions import session_store
+
+router = APIRouter()
+
+
+class SessionCreateRequest(BaseModel):
+    """Request model for creating a session"""
+    model: str = None  # Default model for the session's turns
+    tools: list[str] = None  # Default allowed tools for the session's turns
+
+
+class SessionMessageRequest(BaseModel):
+    """Request model for one turn: only the new user message"""
+    message: str
+    model: str = None  # Optional per-turn model override
+    tools: list[str] = None  # Optional per-turn tools override
+
+
+class SessionTurnResponse(BaseModel):
+    """Response model for one turn"""
+    response: str
+    run_id: str
+    session_id: str
+    seq: int  # seq of the last message stored for this turn
+
+
+@router.post("/sessions")
+async def create_session(request: SessionCreateRequest, db: Session = Depends(get_db)):
+    """
+    Start a conversation.
+
+    Returns:
+        dict: The new session
+    """
+    session = session_store.create(db, model=get_model_id(request.model), tools=request.tools)
+    return session.to_dict()
+
+
+@router.post("/sessions/{session_id}/messages", response_model=SessionTurnResponse)
+async def send_message(session_id: str, request: SessionMessageRequest, db: Session = Depends(get_db)):
+    """
+    Run one turn of a session. The agent sees the stored history plus the
+    new message; the turn's messages are appended to the session.
+    Turns of the same session run one at a time.
+
+    Args:
+        session_id: Session UUID
+
+    Returns:
+        SessionTurnResponse with the agent response and run ID
+    """
+    state = session_store.get(db, session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
+    async with state.turn():
+        model_id = get_model_id(request.model) if request.model else state.model
+        tools = request.tools if request.tools is not None else state.tools
+
+        run = Run(user_query=request.message, status="running", model=model_id, session_id=session_id)
+        db.add(run)
+        db.commit()
+        db.refresh(run)
+
+        tracker = RunTracker(run)
+        engine = AgentEngine(tracker=tracker, tool_registry=get_registry(), model_id=model_id)
+
+        try:
+            response = await engine.run(request.message, allowed_tools=tools, history=state.history)
+        except Exception as e:
+            # History is left unchanged, so the turn can simply be retried
+            await tracker.finalize_async("failed")
+            db.commit()
+            raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+        finally:
+            tracker.close()
+
+        await tracker.finalize_async("completed")
+        db.commit()
+        session_store.append(db, state, engine.new_messages, run_id=run.id)
+
+        return SessionTurnResponse(
+            response=response,
+            run_id=run.id,
+            session_id=session_id,
+            seq=state.next_seq - 1
+        )
+
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str, db: Session = Depends(get_db)):
+    """
+    Get session metadata.
+
+    Args:
+        session_id: Session UUID
+    """
+    session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
+    return session.to_dict()
+
+
+@router.get("/sessions/{session_id}/messages")
+async def get_session_messages(
+    session_id: str,
+    after: int = Query(-1, description="Only messages with seq greater than this"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a session's messages in order. Clients pass the last seq they
+    have as `after` to fetch only new messages.
+
+    Args:
+        session_id: Session UUID
+    """
+    if not db.query(ChatSession.id).filter(ChatSession.id == session_id).first():
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
+    rows = (
+        db.query(SessionMessage)
+        .filter(SessionMessage.session_id == session_id, SessionMessage.seq > after)
+        .order_by(SessionMessage.seq)
+        .limit(limit)
+        .all()
+    )
+    return [row.to_dict() for row in rows]
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, db: Session = Depends(get_db)):
+    """
+    Delete a session and its messages (its runs are kept).
+
+    Args:
+        session_id: Session UUID
+    """
+    if not session_store.delete(db, session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
+
+    return {"message": f"Session '{session_id}' deleted successfully"}
@@ -5,10 +5,9 @@ from pydantic import BaseModel
 from typing import Optional
 from models.database import get_db
 from models.tool import Tool
-from core.tool_registry import ToolRegistry
+from core.tool_registry import get_registry, reload_registry
 
 router = APIRouter()
-# No global registry to allow dynamic discovery
 
 
 class ToolUpdate(BaseModel):
@@ -26,7 +25,7 @@ async def list_tools(db: Session = Depends(get_db)):
     Returns:
         list: Tool metadata for list display
     """
-    registry = ToolRegistry()
+    registry = get_registry()
     tools_list = []
     
     for tool_id, tool_instance in registry.tools.items():
@@ -44,6 +43,21 @@ async def list_tools(db: Session = Depends(get_db)):
     return tools_list
 
 
+@router.post("/tools/reload")
+async def reload_tools():
+    """
+    Re-import only the tool modules whose files changed on disk.
+    
+    Returns:
+        dict: Whether the registry changed and the current tool count
+    """
+    reloaded = reload_registry()
+    return {
+        "reloaded": reloaded,
+        "total_available": len(get_registry())
+    }
+
+
 @router.get("/tools/{tool_id}")
 async def get_tool_schema(tool_id: str, db: Session = Depends(get_db)):
     """
@@ -57,7 +71,7 @@ async def get_tool_schema(tool_id: str, db: Session = Depends(get_db)):
     Returns:
         dict: Complete tool information including schema
     """
-    registry = ToolRegistry()
+    registry = get_registry()
     tool = registry.get_tool(tool_id)
     
     if not tool:
@@ -73,7 +87,7 @@ async def get_tool_schema(tool_id: str, db: Session = Depends(get_db)):
         "id": tool_id,
         "name": tool.display_name,
         "description": tool.description,
-        "schema": tool.get_schema(),
+        "schema": registry.get_schemas([tool_id])[0],
         "icon": tool.icon,
         "enabled": db_tool.enabled if db_tool else True
     }
@@ -97,7 +111,7 @@ async def update_tool(
     Returns:
         dict: Updated tool information
     """
-    registry = ToolRegistry()
+    registry = get_registry()
     
     # Verify tool exists in registry
     tool = registry.get_tool(tool_id)
@@ -117,7 +131,7 @@ async def update_tool(
             name=tool.name,
             display_name=tool.display_name,
             description=tool.description,
-            schema=tool.get_schema(),
+            schema=registry.get_schemas([tool_id])[0],
             icon=tool.icon
         )
         db.add(db_tool)
@@ -142,12 +156,13 @@ async def get_tool_stats(db: Session = Depends(get_db)):
     Returns:
         dict: Tool statistics
     """
-    registry = ToolRegistry()
+    registry = get_registry()
     enabled_count = db.query(Tool).filter(Tool.enabled == True).count()
     disabled_count = db.query(Tool).filter(Tool.enabled == False).count()
     
     return {
         "total_available": len(registry),
         "enabled": enabled_count if enabled_count > 0 else len(registry),
-        "disabled": disabled_count
+        "disabled": disabled_count,
+        "cache": registry.result_cache.stats()
     }
@@ -0,0 +1,11 @@
+"""Server-Sent Events helpers"""
+import json
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Comment line that keeps idle connections open through proxies
+SSE_KEEPALIVE = ": keepalive\n\n"
@@ -1,11 +1,19 @@
 """Enhanced agent engine with run tracking"""
 import os
 import json
-from openai import OpenAI
+import asyncio
+import inspect
+import time
+from typing import Callable, Optional
 from dotenv import load_dotenv
 from core.run_tracker import RunTracker
 from core.tool_registry import ToolRegistry
 from core.model_config import get_model_id, DEFAULT_MODEL
+from core.llm_client import get_llm_client
+from core.llm_cache import LLMResponseCache, get_llm_cache, request_fingerprint
+from core.context_manager import ContextManager
+from core.metrics import LLM_LATENCY, LLM_TOKENS, LLM_RETRIES, LLM_QUEUE_WAIT, TOOL_LATENCY, RUN_ITERATIONS
+from core.rate_limiter import get_limiter, retry_after, is_retryable, backoff_delay
 
 load_dotenv()
 
@@ -16,7 +24,14 @@ class AgentEngine:
     Executes agent loop while capturing all steps for inspection.
     """
     
-    def __init__(self, tracker: RunTracker, tool_registry: ToolRegistry, model_id: str = None):
+    def __init__(
+        self,
+        tracker: RunTracker,
+        tool_registry: ToolRegistry,
+        model_id: str = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        cache: Optional[LLMResponseCache] = None
+    ):
         """
         Initialize agent engine.
         
@@ -24,21 +39,44 @@ class AgentEngine:
             tracker: RunTracker for capturing execution steps
             tool_registry: ToolRegistry for tool execution
             model_id: Optional model ID override
+            on_token: Optional callback (sync or async) receiving assistant
+                text deltas. When set, LLM calls are made with stream=True.
+            cache: Optional response cache (defaults to the shared one when
+                LLM_CACHE is enabled)
         """
         self.tracker = tracker
         self.tool_registry = tool_registry
+        self.on_token = on_token
+        self.cache = cache or get_llm_cache()
         
-        # Initialize OpenAI client (same as agent.py)
-        self.client = OpenAI(
-            api_key=os.getenv("API_KEY"),
-            base_url=os.getenv("API_BASE_URL")
-        )
+        # Shared async client (pooled per API_BASE_URL, never blocks the event loop)
+        self.client = get_llm_client()
         
         # Use provided model ID or fallback to default from config
         self.model = model_id or get_model_id(DEFAULT_MODEL)
         self.max_iterations = int(os.getenv("MAX_ITERATIONS", "10"))
+        self.tool_parallelism = max(1, int(os.getenv("TOOL_MAX_PARALLELISM", "4")))
+        # Ask streaming responses for a final usage chunk (some providers reject this)
+        self.stream_usage = os.getenv("LLM_STREAM_USAGE", "true").lower() in ("1", "true", "yes")
+        self.iteration = 0
+        
+        # 429/5xx/connection errors are retried with jittered exponential backoff
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "4"))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+        self.backoff_max = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+        self._streamed = False
+        
+        # Keeps each request under the model's prompt token budget
+        self.context = ContextManager(self.model)
+        
+        # Per-run dedup of identical calls to cacheable tools
+        self._tool_memo: dict = {}
+        
+        # Conversation of the last run; new_messages is the part it added
+        self._messages: list = []
+        self._history_length = 0
     
-    async def run(self, user_goal: str, allowed_tools: list[str] = None) -> str:
+    async def run(self, user_goal: str, allowed_tools: list[str] = None, history: list = None) -> str:
         """
         Execute agent loop with full tracking.
         This is the enhanced version of run_agent() from agent.py.
@@ -46,6 +84,8 @@ class AgentEngine:
         Args:
             user_goal: User's question/request
             allowed_tools: Optional list of tool names to enable for this run
+            history: Optional earlier conversation messages (without the
+                system prompt) to continue from
             
         Returns:
             str: Final agent response
@@ -65,22 +105,24 @@ class AgentEngine:
             "Do NOT use LaTeX formatting (e.g. $x$) for simple math. Use plain text."
         )
         
+        # Copies, so compaction never rewrites the caller's history
+        history = [dict(message) for message in history or []]
         messages = [
             {"role": "system", "content": system_prompt},
+            *history,
             {"role": "user", "content": user_goal}
         ]
+        self._messages = messages
+        self._history_length = len(history) + 1
         
-        # Get tool schemas
-        # Get tool schemas
-        all_schemas = self.tool_registry.get_schemas()
-        
+        # Get tool schemas (precomputed by the registry)
         if allowed_tools and "auto" in allowed_tools:
             # Auto mode: Use all tools, let agent decide
-            tool_schemas = all_schemas
+            tool_schemas = list(self.tool_registry.get_schemas())
             tool_choice = "auto"
         elif allowed_tools:
             # Specific tools selected: Filter and force usage
-            tool_schemas = [s for s in all_schemas if s['function']['name'] in allowed_tools]
+            tool_schemas = list(self.tool_registry.get_schemas(allowed_tools))
             # Force tool usage if specific tools are requested
             tool_choice = "required" if tool_schemas else "auto"
         else:
@@ -92,47 +134,49 @@ class AgentEngine:
         iteration = 0
         while iteration < self.max_iterations:
             iteration += 1
+            self.iteration = iteration
             
             try:
                 # Call LLM (same as agent.py)
                 # Only force tool usage on the first iteration if requested
                 current_tool_choice = tool_choice if iteration == 1 else "auto"
                 
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    tools=tool_schemas,
-                    tool_choice=current_tool_choice,
-                    stream=False
-                )
+                # Compact old tool outputs if the prompt is over budget
+                compaction = self.context.fit(messages, tool_schemas)
+                if compaction:
+                    self.tracker.add_step({'type': 'context-compaction', **compaction})
                 
-                assistant_message = response.choices[0].message
+                content, tool_calls = await self._complete_cached(
+                    messages, tool_schemas, current_tool_choice
+                )
                 
                 # Handle compatibility: Ensure content is not None
                 # Some providers (like Gemini) require content field even for tool calls
                 msg_dict = {
-                    "role": assistant_message.role,
-                    "content": assistant_message.content if assistant_message.content is not None else ""
+                    "role": "assistant",
+                    "content": content if content is not None else ""
                 }
                 
-                if assistant_message.tool_calls:
-                    msg_dict["tool_calls"] = assistant_message.tool_calls
+                if tool_calls:
+                    msg_dict["tool_calls"] = tool_calls
                 
                 messages.append(msg_dict)
                 
                 # Check if AI wants to use a tool
-                if assistant_message.tool_calls:
+                if tool_calls:
                     # Track agent thinking
-                    tool_names = [tc.function.name for tc in assistant_message.tool_calls]
+                    tool_names = [tc["function"]["name"] for tc in tool_calls]
                     self.tracker.add_step({
                         'type': 'agent-thought',
                         'content': f"Using tool(s): {', '.join(tool_names)}"
                     })
                     
-                    # Execute each tool call
-                    for tool_call in assistant_message.tool_calls:
-                        tool_name = tool_call.function.name
-                        args = json.loads(tool_call.function.arguments)
+                    # Parse and track every call up front, in the model's order
+                    parsed_calls = []
+                    for tool_call in tool_calls:
+                        tool_name = tool_call["function"]["name"]
+                        args = json.loads(tool_call["function"]["arguments"] or "{}")
+                        parsed_calls.append((tool_call, tool_name, args))
                         
                         # Track tool call
                         self.tracker.add_step({
@@ -140,25 +184,31 @@ class AgentEngine:
                             'toolName': tool_name,
                             'params': args
                         })
-                        
-                        # Execute tool via registry
-                        try:
-                            result = self.tool_registry.execute(tool_name, **args)
-                        except Exception as e:
-                            result = f"Error executing tool: {str(e)}"
-                        
+                    
+                    # Execute independent calls concurrently (bounded)
+                    results, reused = await self._execute_tool_calls(
+                        [(tool_name, args) for _, tool_name, args in parsed_calls]
+                    )
+                    
+                    # Record results in the same order as the tool_call_ids
+                    for (tool_call, tool_name, _), (result, duration_ms), was_reused in zip(parsed_calls, results, reused):
                         # Track tool result
-                        self.tracker.add_step({
+                        step = {
                             'type': 'tool-result',
                             'toolName': tool_name,
                             'result': str(result)
-                        })
+                        }
+                        if was_reused:
+                            step['deduplicated'] = True
+                        else:
+                            step['duration_ms'] = duration_ms
+                        self.tracker.add_step(step)
                         
-                        # Add result to conversation
+                        # Add result to conversation (size-capped; the step keeps it all)
                         messages.append({
                             "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": str(result)
+                            "tool_call_id": tool_call["id"],
+                            "content": self.context.cap_tool_result(str(result))
                         })
                     
                     # Continue loop - AI will process tool results
@@ -166,13 +216,14 @@ class AgentEngine:
                 
                 else:
                     # AI doesn't need more tools - has final answer
-                    final_response = assistant_message.content or "No response"
+                    final_response = content or "No response"
                     
                     self.tracker.add_step({
                         'type': 'agent-response',
                         'content': final_response
                     })
                     
+                    RUN_ITERATIONS.observe(iteration)
                     return final_response
             
             except Exception as e:
@@ -181,6 +232,7 @@ class AgentEngine:
                     'type': 'agent-response',
                     'content': error_msg
                 })
+                RUN_ITERATIONS.observe(iteration)
                 raise
         
         # Max iterations reached
@@ -189,8 +241,261 @@ class AgentEngine:
             'type': 'agent-response',
             'content': max_iter_msg
         })
+        RUN_ITERATIONS.observe(iteration)
         return max_iter_msg
     
+    @property
+    def new_messages(self) -> list:
+        """Messages the last run added (user turn onward), for session persistence."""
+        return self._messages[self._history_length:]
+    
+    async def _execute_tool_calls(self, calls: list) -> tuple:
+        """
+        Execute tool calls concurrently, at most tool_parallelism at a time.
+        Tools are synchronous, so each one runs in a worker thread.
+        Identical calls to cacheable tools run once per run and share the result.
+        
+        Args:
+            calls: List of (tool_name, args) tuples
+            
+        Returns:
+            tuple: (results, reused) lists in the same order as calls, where
+                results[i] is (result, duration_ms) and reused[i] is True if
+                result i came from an earlier identical call
+        """
+        semaphore = asyncio.Semaphore(self.tool_parallelism)
+        
+        async def execute_one(tool_name: str, args: dict):
+            async with semaphore:
+                started = time.perf_counter()
+                # Execute tool via registry
+                try:
+                    result = await asyncio.to_thread(self.tool_registry.execute, tool_name, **args)
+                except Exception as e:
+                    result = f"Error executing tool: {str(e)}"
+                elapsed = time.perf_counter() - started
+                TOOL_LATENCY.observe(elapsed, tool=tool_name)
+                return result, round(elapsed * 1000, 1)
+        
+        pending = []
+        reused = []
+        for tool_name, args in calls:
+            tool = self.tool_registry.get_tool(tool_name)
+            if tool is None or not tool.cacheable:
+                pending.append(execute_one(tool_name, args))
+                reused.append(False)
+                continue
+            
+            memo_key = (tool_name, tool.cache_key(**args))
+            task = self._tool_memo.get(memo_key)
+            reused.append(task is not None)
+            if task is None:
+                task = asyncio.ensure_future(execute_one(tool_name, args))
+                self._tool_memo[memo_key] = task
+            pending.append(task)
+        
+        results = await asyncio.gather(*pending)
+        return results, reused
+    
+    async def _complete_cached(self, messages: list, tool_schemas: list, tool_choice: str):
+        """
+        _complete() behind the response cache, when one is configured.
+        Each lookup is recorded as an 'llm-cache' step with running counters.
+        """
+        if self.cache is None:
+            return await self._complete(messages, tool_schemas, tool_choice)
+        
+        key = request_fingerprint(self.model, messages, tool_schemas, tool_choice)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        
+        self.tracker.add_step({
+            'type': 'llm-cache',
+            'hit': cached is not None,
+            'key': key[:16],
+            'hits': self.cache.hits,
+            'misses': self.cache.misses
+        })
+        
+        if cached is not None:
+            # Streaming clients still see the text, just in one piece
+            if self.on_token is not None and cached["content"]:
+                result = self.on_token(cached["content"])
+                if inspect.isawaitable(result):
+                    await result
+            return cached["content"], cached["tool_calls"]
+        
+        content, tool_calls = await self._complete(messages, tool_schemas, tool_choice)
+        await asyncio.to_thread(self.cache.set, key, {"content": content, "tool_calls": tool_calls})
+        return content, tool_calls
+    
+    async def _complete(self, messages: list, tool_schemas: list, tool_choice: str):
+        """
+        Call the LLM once and return the assistant message parts.
+        
+        The call goes through the model's limiter (queueing while it is at
+        its concurrency or per-minute limits) and is retried on rate limits
+        and transient errors, honoring Retry-After. Wall time and token
+        usage are recorded as an 'llm-call' step and in the process metrics.
+        
+        Returns:
+            tuple: (content, tool_calls) where tool_calls is a list of
+                OpenAI-format dicts (or an empty list)
+        """
+        limiter = get_limiter(self.model)
+        estimated_tokens = self.context.estimate(messages, tool_schemas)
+        queued = 0.0
+        attempt = 0
+        
+        while True:
+            acquired = False
+            usage = None
+            error = None
+            try:
+                waited = await limiter.acquire(estimated_tokens)
+                acquired = True
+                queued += waited
+                LLM_QUEUE_WAIT.observe(waited, model=self.model)
+                
+                started = time.perf_counter()
+                self._streamed = False
+                content, tool_calls, usage = await self._request(messages, tool_schemas, tool_choice)
+            except Exception as e:
+                if not acquired:
+                    raise
+                error = e
+            finally:
+                # Also on cancellation, or the slot would be held forever;
+                # usage is only set (and corrects the estimate) on success
+                if acquired:
+                    limiter.release(estimated_tokens, getattr(usage, "total_tokens", None))
+            
+            if error is None:
+                elapsed = time.perf_counter() - started
+                break
+            
+            # Text already sent to a streaming client can't be taken back
+            if attempt >= self.max_retries or self._streamed or not is_retryable(error):
+                raise error
+            
+            requested = retry_after(error)
+            delay = requested if requested is not None else backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            status = getattr(error, "status_code", None)
+            if status == 429:
+                # Hold every request for this model, not just this one
+                limiter.pause(delay)
+            
+            attempt += 1
+            LLM_RETRIES.inc(model=self.model, reason=str(status or type(error).__name__))
+            self.tracker.add_step({
+                'type': 'llm-retry',
+                'model': self.model,
+                'attempt': attempt,
+                'status': status,
+                'error': str(error),
+                'delay_s': round(delay, 2)
+            })
+            await asyncio.sleep(delay)
+        
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        
+        LLM_LATENCY.observe(elapsed, model=self.model)
+        if prompt_tokens is not None:
+            LLM_TOKENS.inc(prompt_tokens, model=self.model, type="prompt")
+        if completion_tokens is not None:
+            LLM_TOKENS.inc(completion_tokens, model=self.model, type="completion")
+        
+        self.tracker.add_step({
+            'type': 'llm-call',
+            'model': self.model,
+            'iteration': self.iteration,
+            'latency_ms': round(elapsed * 1000, 1),
+            'queued_ms': round(queued * 1000, 1),
+            'retries': attempt,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens
+        })
+        return content, tool_calls
+    
+    async def _request(self, messages: list, tool_schemas: list, tool_choice: str):
+        """
+        Make the provider request (streaming when on_token is set).
+        
+        Returns:
+            tuple: (content, tool_calls, usage) where usage is the provider's
+                usage object or None if it wasn't reported
+        """
+        if self.on_token is None:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tool_schemas,
+                tool_choice=tool_choice,
+                stream=False
+            )
+            
+            message = response.choices[0].message
+            tool_calls = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {
+                        "name": tc.function.name,
+                        "arguments": tc.function.arguments
+                    }
+                }
+                for tc in (message.tool_calls or [])
+            ]
+            return message.content, tool_calls, getattr(response, "usage", None)
+        
+        extra = {"stream_options": {"include_usage": True}} if self.stream_usage else {}
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tool_schemas,
+            tool_choice=tool_choice,
+            stream=True,
+            **extra
+        )
+        
+        content_parts = []
+        calls_by_index = {}
+        usage = None
+        
+        async for chunk in stream:
+            # The usage chunk (if requested) comes last, with no choices
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            
+            if delta.content:
+                content_parts.append(delta.content)
+                self._streamed = True
+                result = self.on_token(delta.content)
+                if inspect.isawaitable(result):
+                    await result
+            
+            # Tool call arguments arrive as fragments keyed by index
+            for tc in delta.tool_calls or []:
+                call = calls_by_index.setdefault(tc.index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if tc.id:
+                    call["id"] = tc.id
+                if tc.function:
+                    if tc.function.name:
+                        call["function"]["name"] += tc.function.name
+                    if tc.function.arguments:
+                        call["function"]["arguments"] += tc.function.arguments
+        
+        tool_calls = [calls_by_index[i] for i in sorted(calls_by_index)]
+        content = "".join(content_parts) if content_parts else None
+        return content, tool_calls, usage
+    
     def __repr__(self):
         return f"<AgentEngine: model={self.model}, tools={len(self.tool_registry)}>"
 
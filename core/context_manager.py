@@ -0,0 +1,126 @@
+"""Token-budgeted compaction of the agent's conversation history"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from core.model_config import get_context_budget
+
+CHARS_PER_TOKEN = 4  # rough estimate; providers differ, so no tokenizer dependency
+MESSAGE_OVERHEAD_TOKENS = 4  # role/framing per message
+COMPACTED_PREVIEW_CHARS = 200  # kept from an old tool output when compacting it
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a string."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class ContextManager:
+    """
+    Keeps the prompt for each LLM call under a per-model token budget.
+
+    - Every tool result is capped at tool_result_max_chars when it enters
+      the conversation (head and tail kept).
+    - When the estimate exceeds the budget, the oldest tool outputs are
+      replaced by a short preview until it fits. The system prompt, user
+      request and the latest round of tool results are never touched.
+
+    Compaction only ever rewrites a message once, oldest first, so the
+    request prefix stays identical across iterations (friendly to provider
+    prompt caching and to the LLM response cache).
+    """
+
+    def __init__(self, model_id: str, budget: int = None, tool_result_max_chars: int = None):
+        """
+        Args:
+            model_id: Backend model ID (selects the budget from model_config)
+            budget: Prompt token budget override
+            tool_result_max_chars: Cap per tool result (defaults to
+                TOOL_RESULT_MAX_CHARS or 8000)
+        """
+        self.budget = budget or get_context_budget(model_id)
+        self.tool_result_max_chars = tool_result_max_chars or int(os.getenv("TOOL_RESULT_MAX_CHARS", "8000"))
+        self.tokens_saved = 0  # over the whole run
+        self._pending_saved = 0  # from capping, not yet reported
+        self._compacted = set()  # message indexes already compacted (messages only grow)
+
+    def estimate(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Approximate prompt tokens for a request."""
+        total = estimate_tokens(json.dumps(tools)) if tools else 0
+        for message in messages:
+            total += MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+            if message.get("tool_calls"):
+                total += estimate_tokens(json.dumps(message["tool_calls"]))
+        return total
+
+    def cap_tool_result(self, result: str) -> str:
+        """
+        Truncate a tool result to tool_result_max_chars for the conversation
+        (the run step keeps the full result).
+        """
+        limit = self.tool_result_max_chars
+        if len(result) <= limit:
+            return result
+
+        head = result[:limit * 3 // 4]
+        tail = result[-(limit // 4):]
+        capped = f"{head}\n...[{len(result) - len(head) - len(tail)} characters truncated]...\n{tail}"
+        saved = estimate_tokens(result) - estimate_tokens(capped)
+        self.tokens_saved += saved
+        self._pending_saved += saved
+        return capped
+
+    def fit(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Compact messages in place until they fit the budget.
+
+        Returns:
+            dict: Stats for a 'context-compaction' step, or None if nothing
+                was saved since the last call
+        """
+        tokens = self.estimate(messages, tools)
+        before = tokens + self._pending_saved
+        compacted = 0
+
+        if tokens > self.budget:
+            for index in self._compactable(messages):
+                message = messages[index]
+                content = message["content"]
+                replacement = (
+                    f"{content[:COMPACTED_PREVIEW_CHARS]}\n"
+                    f"...[older tool output compacted: {len(content) - COMPACTED_PREVIEW_CHARS} characters removed]"
+                )
+                saved = estimate_tokens(content) - estimate_tokens(replacement)
+                if saved <= 0:
+                    continue
+                message["content"] = replacement
+                self._compacted.add(index)
+                tokens -= saved
+                self.tokens_saved += saved
+                compacted += 1
+                if tokens <= self.budget:
+                    break
+
+        if before == tokens:
+            return None
+
+        self._pending_saved = 0
+        return {
+            "budget": self.budget,
+            "tokens_before": before,
+            "tokens_after": tokens,
+            "tokens_saved": before - tokens,
+            "tokens_saved_total": self.tokens_saved,
+            "compacted_messages": compacted
+        }
+
+    def _compactable(self, messages: List[Dict[str, Any]]) -> List[int]:
+        """Indexes of tool outputs older than the latest assistant turn, oldest first."""
+        last_assistant = max(
+            (i for i, m in enumerate(messages) if m["role"] == "assistant"),
+            default=len(messages)
+        )
+        return [
+            i for i, m in enumerate(messages[:last_assistant])
+            if m["role"] == "tool" and i not in self._compacted
+        ]
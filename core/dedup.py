@@ -0,0 +1,173 @@
+"""
+Near-duplicate chunk detection for knowledge base ingestion.
+
+Chunks are fingerprinted with a 64-bit SimHash over word 3-shingles;
+two chunks are near-duplicates when their fingerprints differ in few
+enough bits. Lookups use banding: with max distance d the fingerprint is
+cut into d + 1 bands, and any match within d bits must agree exactly on
+at least one band.
+"""
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+REPORT_SAMPLES = 10  # example duplicates kept per document report
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a text chunk (case and punctuation insensitive)."""
+    import numpy as np
+
+    words = re.findall(r"\w+", text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = [" ".join(words) or text]
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles],
+        dtype="<u8"
+    )
+    # Each shingle votes on every bit; the majority wins
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes, bitorder="little").tobytes(), "little")
+
+
+def similarity(a: int, b: int) -> float:
+    """Fraction of matching fingerprint bits (1.0 = identical)."""
+    return 1 - (a ^ b).bit_count() / FINGERPRINT_BITS
+
+
+class NearDuplicateIndex:
+    """Fingerprints of stored chunks, searchable within a similarity threshold."""
+
+    def __init__(self, threshold: float):
+        """
+        Args:
+            threshold: Minimum similarity (0-1) for two chunks to count as duplicates
+        """
+        self.threshold = threshold
+        self.max_distance = min(int((1 - threshold) * FINGERPRINT_BITS + 1e-9), FINGERPRINT_BITS - 1)
+
+        bands = self.max_distance + 1
+        edges = [round(i * FINGERPRINT_BITS / bands) for i in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._buckets: List[Dict[int, set]] = [{} for _ in self._bands]
+        self._entries: Dict[str, Tuple[int, str]] = {}  # chunk id -> (fingerprint, source)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, chunk_id: str, fingerprint: int, source: str):
+        self.remove(chunk_id)
+        self._entries[chunk_id] = (fingerprint, source)
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            buckets.setdefault(key, set()).add(chunk_id)
+
+    def remove(self, chunk_id: str):
+        entry = self._entries.pop(chunk_id, None)
+        if entry is None:
+            return
+        for buckets, key in zip(self._buckets, self._band_keys(entry[0])):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(chunk_id)
+                if not bucket:
+                    del buckets[key]
+
+    def replace_source(self, source: str, fingerprints: Dict[str, int]):
+        """Swap in the fingerprints of a (re-)ingested document."""
+        for chunk_id in [cid for cid, (_, src) in self._entries.items() if src == source]:
+            self.remove(chunk_id)
+        for chunk_id, fingerprint in fingerprints.items():
+            self.add(chunk_id, fingerprint, source)
+
+    def find(self, fingerprint: int, exclude_source: Optional[str] = None) -> Optional[Tuple[str, str, float]]:
+        """
+        Closest stored near-duplicate.
+
+        Args:
+            fingerprint: SimHash of the candidate chunk
+            exclude_source: Ignore chunks from this document
+
+        Returns:
+            tuple: (chunk_id, source, similarity) or None
+        """
+        best = None
+        best_distance = self.max_distance + 1
+        seen = set()
+        for buckets, key in zip(self._buckets, self._band_keys(fingerprint)):
+            for chunk_id in buckets.get(key, ()):
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                stored, source = self._entries[chunk_id]
+                if source == exclude_source:
+                    continue
+                distance = (stored ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best, best_distance = (chunk_id, source), distance
+
+        if best is None:
+            return None
+        return best[0], best[1], 1 - best_distance / FINGERPRINT_BITS
+
+    def _band_keys(self, fingerprint: int):
+        return [(fingerprint >> start) & mask for start, mask in self._bands]
+
+
+class DocumentDeduper:
+    """
+    One document's dedup pass. New chunks are checked against other
+    documents in the shared index and against earlier chunks of the same
+    document; already-stored chunks are kept as-is.
+    """
+
+    def __init__(self, index: NearDuplicateIndex, source: str):
+        self.index = index
+        self.source = source
+        self.local = NearDuplicateIndex(index.threshold)
+        self.fingerprints: Dict[str, int] = {}  # kept chunk id -> fingerprint
+        self.canonical_ids: set = set()  # other documents' chunks standing in for skipped ones
+        self.checked = 0
+        self.skipped = 0
+        self.samples: List[Dict[str, Any]] = []
+
+    def keep(self, chunk_id: str, text: str, is_new: bool) -> bool:
+        """Whether to store a chunk (False = near-duplicate, skip it)."""
+        fingerprint = simhash(text)
+
+        if is_new:
+            self.checked += 1
+            match = self.index.find(fingerprint, exclude_source=self.source)
+            if match is not None:
+                # This document now relies on that chunk staying in the store
+                self.canonical_ids.add(match[0])
+            else:
+                match = self.local.find(fingerprint)
+            if match is not None:
+                self.skipped += 1
+                if len(self.samples) < REPORT_SAMPLES:
+                    self.samples.append({
+                        "chunk": text[:80],
+                        "duplicate_of": match[0],
+                        "source": match[1],
+                        "similarity": round(match[2], 3)
+                    })
+                return False
+
+        self.local.add(chunk_id, fingerprint, self.source)
+        self.fingerprints[chunk_id] = fingerprint
+        return True
+
+    def report(self) -> Dict[str, Any]:
+        """Per-document summary stored in the manifest."""
+        return {
+            "threshold": self.index.threshold,
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "samples": self.samples
+        }
@@ -0,0 +1,97 @@
+"""
+Content-addressed cache for document embeddings.
+Wraps a LangChain embeddings object so unchanged chunks are never re-embedded.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List
+
+# Kept outside the vector store directory so clearing the KB keeps the cache
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./agent_embedding_cache.db")
+
+
+def content_hash(text: str) -> str:
+    """sha256 hex digest of a text chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings:
+    """
+    Embeddings wrapper (embed_documents/embed_query) backed by SQLite.
+    Vectors are keyed by model name + content hash, so identical chunks
+    from any file, or from a re-ingested file, are embedded only once.
+    """
+
+    def __init__(self, embeddings, model_name: str, path: str = CACHE_PATH):
+        """
+        Args:
+            embeddings: Underlying LangChain embeddings object
+            model_name: Included in the key so switching models can't return stale vectors
+            path: SQLite file for cached vectors
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{content_hash(text)}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, computing only the ones not already cached."""
+        keys = [self._key(text) for text in texts]
+        vectors = self._lookup(set(keys))
+
+        # Embed each missing text once, even if it repeats in this batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self._store(new_vectors)
+            vectors.update(new_vectors)
+
+        return [list(vectors[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Queries are not cached here; they rarely repeat verbatim as chunks."""
+        return self.embeddings.embed_query(text)
+
+    def _lookup(self, keys: set) -> dict:
+        found = {}
+        key_list = list(keys)
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, vectors: dict):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
@@ -0,0 +1,131 @@
+"""Background knowledge-base ingestion jobs"""
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class IngestJob:
+    """
+    State of one background ingestion.
+    Status: queued, running, completed, failed
+    """
+
+    def __init__(self, kind: str, path: str):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.path = path
+        self.status = "queued"
+        self.done = 0
+        self.total = 0
+        self.result: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def set_progress(self, done: int, total: int):
+        """Progress callback handed to the ingestion function."""
+        self.done = done
+        self.total = total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict for API responses"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "path": self.path,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "result": self.result,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class QueueFullError(Exception):
+    """Raised when too many ingestion jobs are already waiting."""
+
+
+class IngestJobManager:
+    """
+    Runs ingestion jobs on a bounded thread pool so callers (the agent
+    loop, API requests) get a job id immediately instead of blocking.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, history: int = 200):
+        """
+        Args:
+            max_workers: Concurrent jobs (defaults to KB_JOB_WORKERS or 2)
+            max_pending: Max queued + running jobs (defaults to KB_JOB_QUEUE_SIZE or 32)
+            history: Finished jobs kept for status lookups
+        """
+        self.max_pending = max_pending or int(os.getenv("KB_JOB_QUEUE_SIZE", "32"))
+        self.history = history
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("KB_JOB_WORKERS", "2")),
+            thread_name_prefix="ingest"
+        )
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, path: str, fn: Callable[[Callable[[int, int], None]], str]) -> IngestJob:
+        """
+        Queue an ingestion.
+
+        Args:
+            kind: "file" or "directory"
+            path: What is being ingested (for display)
+            fn: Does the work; receives a progress(done, total) callback and
+                returns the result message
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        job = IngestJob(kind, path)
+
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+            if active >= self.max_pending:
+                raise QueueFullError(f"Ingestion queue is full ({active} jobs pending)")
+            self._jobs[job.id] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        """All known jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def _run(self, job: IngestJob, fn: Callable):
+        job.status = "running"
+        job.started_at = datetime.now()
+        try:
+            job.result = fn(job.set_progress)
+            # Ingestion methods report problems as "Error..." strings
+            job.status = "failed" if job.result.startswith("Error") else "completed"
+        except Exception as e:
+            job.result = f"Error: {str(e)}"
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit."""
+        finished = [j for j in self._jobs.values() if j.status in ("completed", "failed")]
+        if len(finished) > self.history:
+            finished.sort(key=lambda j: j.created_at)
+            for job in finished[:len(finished) - self.history]:
+                del self._jobs[job.id]
+
+
+# Shared manager for the process
+ingest_jobs = IngestJobManager()
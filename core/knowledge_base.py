@@ -1,14 +1,39 @@
 """
-RAG Knowledge Base implementation using LangChain and ChromaDB.
+RAG Knowledge Base implementation using LangChain and a pluggable
+vector store (ChromaDB or a memory-mapped NumPy index).
 Handles document ingestion, embedding, and retrieval.
 """
 import os
+import re
+import glob
+import json
+import time
+import hashlib
 import shutil
-from typing import List
+import queue
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from core.embedding_cache import CachedEmbeddings, content_hash
+from core.dedup import DocumentDeduper, NearDuplicateIndex
+from core.vector_store import SentenceTransformerEmbeddings, create_vector_store
 
 # Constants
 PERSIST_DIRECTORY = "./agent_knowledge_db"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+MANIFEST_FILE = "documents.json"  # file hash + chunk ids per ingested document
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+EMBED_BATCH_SIZE = int(os.getenv("KB_EMBED_BATCH_SIZE", "256"))  # chunks per vector store write
+READ_BLOCK_SIZE = int(os.getenv("KB_READ_BLOCK_SIZE", str(1 << 20)))  # characters read per text-file block
+INGEST_PREFETCH = int(os.getenv("KB_INGEST_PREFETCH", "1024"))  # chunks parsed ahead of embedding
+QUERY_CACHE_SIZE = int(os.getenv("KB_QUERY_CACHE_SIZE", "256"))  # cached recall results / query embeddings
+DEDUP_ENABLED = os.getenv("KB_DEDUP", "true").lower() in ("1", "true", "yes")  # skip near-duplicate chunks
+DEDUP_THRESHOLD = float(os.getenv("KB_DEDUP_THRESHOLD", "0.95"))  # SimHash similarity (0-1) counted as duplicate
+VECTOR_BACKEND = os.getenv("KB_VECTOR_BACKEND", "chroma").lower()  # "chroma" or "numpy"
 
 class KnowledgeBase:
     """
@@ -18,80 +43,320 @@ class KnowledgeBase:
     def __init__(self):
         """Initialize and check dependencies."""
         print("Initializing Knowledge Base...")
+        started = time.perf_counter()
         self.vector_db = None
         self.embeddings = None
+        self.documents = self._load_manifest()
+        # Ingestion may run from several job threads; writes are serialized
+        self._write_lock = threading.Lock()
+        
+        # Recall caches; results are only valid for the generation (local writes)
+        # and store version (writes by any process) they were computed in
+        self.generation = 0
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_embeddings: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Fingerprints of stored chunks for near-duplicate detection
+        self.dedup_index = self._build_dedup_index()
         
         # Lazy load to prevent import crashes during tool discovery
         try:
-            from langchain_community.embeddings import HuggingFaceEmbeddings
-            from langchain_community.vectorstores import Chroma
+            # Initialize embedding model (runs locally), cached by chunk content hash.
+            # The numpy backend skips LangChain here; both produce the same vectors.
+            if VECTOR_BACKEND == "numpy":
+                model = SentenceTransformerEmbeddings(EMBEDDING_MODEL)
+            else:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+            self.embeddings = CachedEmbeddings(model, model_name=EMBEDDING_MODEL)
             
-            # Initialize embedding model (runs locally)
-            self.embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-            
-            # Initialize Vector Store (ChromaDB)
-            self.vector_db = Chroma(
-                persist_directory=PERSIST_DIRECTORY,
-                embedding_function=self.embeddings
-            )
-            print(f"Knowledge Base initialized at {PERSIST_DIRECTORY}")
+            # Initialize Vector Store
+            self.vector_db = create_vector_store(VECTOR_BACKEND, self.embeddings, PERSIST_DIRECTORY)
+            print(f"Knowledge Base initialized at {PERSIST_DIRECTORY} ({VECTOR_BACKEND} backend)")
         except Exception as e:
             print(f"Failed to initialize KnowledgeBase: {e}")
+        
+        self.init_ms = (time.perf_counter() - started) * 1000
+
+    def warmup(self) -> dict:
+        """
+        Pay one-time costs up front: run one dummy encode through the
+        embedding model and open the vector store.
+        
+        Returns:
+            dict: Timings in ms (model load, first encode, collection open)
+        
+        Raises:
+            RuntimeError: If the knowledge base failed to initialize
+        """
+        if self.vector_db is None:
+            raise RuntimeError("Knowledge Base not initialized (missing dependencies?)")
+        
+        started = time.perf_counter()
+        self.embeddings.embed_query("warmup")
+        encoded = time.perf_counter()
+        chunk_count = self.vector_db.count()
+        opened = time.perf_counter()
+        
+        return {
+            "init_ms": round(self.init_ms, 1),
+            "encode_ms": round((encoded - started) * 1000, 1),
+            "collection_ms": round((opened - encoded) * 1000, 1),
+            "chunks": chunk_count
+        }
 
-    def add_document(self, file_path: str) -> str:
+    def add_document(self, file_path: str, progress: Optional[Callable[[int, int], None]] = None) -> str:
         """
         Ingest a document into the knowledge base.
         Supports PDF, TXT, MD.
+        
+        Re-ingesting is incremental: an unchanged file (same hash) is
+        skipped, and for a changed file only new chunks are embedded and
+        added while chunks that disappeared are deleted.
+        
+        The file is streamed: chunks are produced page by page (PDF) or
+        block by block (text) and embedded in EMBED_BATCH_SIZE batches
+        while parsing continues, so memory use doesn't grow with file size.
+        
+        Args:
+            file_path: Path to the document
+            progress: Optional callback(done, total) in files
         """
-        if not self.vector_db:
+        if self.vector_db is None:
             return "Error: Knowledge Base not initialized (missing dependencies?)"
 
         if not os.path.exists(file_path):
             return f"Error: File '{file_path}' not found."
-            
+        
+        file_path = os.path.abspath(file_path)
+        
+        with self._write_lock:
+            result = self._add_document(file_path)
+        if progress:
+            progress(1, 1)
+        return result
+
+    def _add_document(self, file_path: str) -> str:
         try:
-            # Lazy import loaders
-            from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
-            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            file_hash = _hash_file(file_path)
+            record = self.documents.get(file_path)
+            if record and record["file_hash"] == file_hash:
+                return f"'{file_path}' is unchanged; already in knowledge base ({len(record['chunk_ids'])} chunks)."
 
-            # 1. Load Document
-            loader = self._get_loader(file_path)
-            if not loader:
+            if os.path.splitext(file_path)[1].lower() not in SUPPORTED_EXTENSIONS:
                 return f"Error: Unsupported file type for '{file_path}'"
-                
-            documents = loader.load()
             
-            # 2. Split Text
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
-            )
-            chunks = text_splitter.split_documents(documents)
+            old_ids = self._stored_ids(file_path)
+            
+            deduper = self._deduper(file_path)
+            
+            # 1-3. Stream chunks page/block-wise and embed new ones in batches.
+            # Parsing runs ahead in a thread (bounded), so it overlaps embedding
+            # and memory stays flat regardless of file size.
+            misses_before = self.embeddings.misses
+            chunk_ids = []
+            pending: Dict[str, Tuple[str, dict]] = {}
+            new_count = 0
+            
+            chunks = _prefetch(_iter_chunks(file_path), INGEST_PREFETCH)
+            for chunk_id, text, metadata in self._select_chunks(file_path, chunks, old_ids, deduper):
+                chunk_ids.append(chunk_id)
+                if chunk_id in old_ids:
+                    continue
+                pending[chunk_id] = (text, metadata)
+                new_count += 1
+                if len(pending) >= EMBED_BATCH_SIZE:
+                    self._add_chunks(pending)
+                    pending = {}
+            
+            if pending:
+                self._add_chunks(pending)
             
-            # 3. Add to Vector DB
-            self.vector_db.add_documents(chunks)
+            # 4. Drop chunks that disappeared from the document
+            stale_ids = old_ids - set(chunk_ids)
+            if stale_ids:
+                self._delete_chunks(stale_ids)
             self.vector_db.persist()
+            embedded = self.embeddings.misses - misses_before
             
-            return f"Successfully added '{file_path}' to knowledge base. Created {len(chunks)} chunks."
+            self.documents[file_path] = self._document_record(file_hash, chunk_ids, deduper)
+            self._save_manifest()
+            
+            # Documents whose skipped duplicates pointed at removed chunks lost that content
+            reingested = self._reingest_dependents(stale_ids)
+            
+            return (
+                f"Successfully added '{file_path}' to knowledge base. Created {len(chunk_ids)} chunks "
+                f"({new_count} new, {len(stale_ids)} stale removed, {embedded} embedded"
+                f"{_dedup_summary(deduper)}{_reingest_summary(reingested)})."
+            )
             
         except Exception as e:
+            # The manifest wasn't updated; don't keep fingerprints for this attempt
+            self.dedup_index = self._build_dedup_index()
             return f"Error adding document: {str(e)}"
 
+    def add_directory(self, path: str, workers: int = None, progress: Optional[Callable[[int, int], None]] = None) -> str:
+        """
+        Bulk-ingest every supported file in a directory (recursively) or
+        matching a glob pattern.
+        
+        Files are loaded and split in a process pool; new chunks from all
+        files are embedded and written in EMBED_BATCH_SIZE batches as
+        results arrive, with a single persist and manifest write at the end.
+        
+        Args:
+            path: Directory or glob pattern (e.g. "docs/**/*.pdf")
+            workers: Loader processes (defaults to KB_INGEST_WORKERS or CPU count)
+            progress: Optional callback(done, total) in files
+        """
+        if self.vector_db is None:
+            return "Error: Knowledge Base not initialized (missing dependencies?)"
+        
+        with self._write_lock:
+            return self._add_directory(path, workers, progress or (lambda done, total: None))
+
+    def _add_directory(self, path: str, workers: Optional[int], progress: Callable[[int, int], None]) -> str:
+        files = _resolve_files(path)
+        if not files:
+            return f"Error: No supported files ({', '.join(SUPPORTED_EXTENSIONS)}) found for '{path}'."
+        
+        started = time.perf_counter()
+        workers = workers or int(os.getenv("KB_INGEST_WORKERS", str(os.cpu_count() or 1)))
+        
+        # Skip unchanged files before paying for any parsing
+        to_load = {}
+        for file_path in files:
+            file_hash = _hash_file(file_path)
+            record = self.documents.get(file_path)
+            if not (record and record["file_hash"] == file_hash):
+                to_load[file_path] = file_hash
+        
+        progress(0, len(to_load))
+        
+        pending: Dict[str, Tuple[str, dict]] = {}
+        updates = {}
+        errors = []
+        removed_ids = set()
+        total_chunks = new_count = stale_count = dup_count = 0
+        misses_before = self.embeddings.misses
+        
+        def handle(file_path: str, chunks: List[Tuple[str, dict]]):
+            nonlocal total_chunks, new_count, stale_count, dup_count
+            deduper = self._deduper(file_path)
+            chunk_ids, new_chunks, stale_ids = self._plan_update(file_path, chunks, deduper)
+            if stale_ids:
+                self._delete_chunks(stale_ids)
+                removed_ids.update(stale_ids)
+            updates[file_path] = self._document_record(to_load[file_path], chunk_ids, deduper)
+            pending.update(new_chunks)
+            total_chunks += len(chunk_ids)
+            new_count += len(new_chunks)
+            stale_count += len(stale_ids)
+            dup_count += deduper.skipped if deduper else 0
+            
+            progress(len(updates) + len(errors), len(to_load))
+        
+        def write_batches(final: bool = False):
+            """
+            Embed and write pending chunks in large batches while other files
+            are still parsing. Chunks leave pending only once written; a
+            failed write is not a per-file error, it aborts the whole run
+            (the records in updates cover chunks of several files).
+            """
+            while pending and (final or len(pending) >= EMBED_BATCH_SIZE):
+                batch_ids = list(pending)[:EMBED_BATCH_SIZE]
+                self._add_chunks({chunk_id: pending[chunk_id] for chunk_id in batch_ids})
+                for chunk_id in batch_ids:
+                    del pending[chunk_id]
+        
+        try:
+            if workers <= 1 or len(to_load) <= 1:
+                for file_path in to_load:
+                    try:
+                        handle(file_path, _load_and_split(file_path))
+                    except Exception as e:
+                        errors.append(f"{file_path}: {e}")
+                        progress(len(updates) + len(errors), len(to_load))
+                    write_batches()
+            else:
+                # spawn: forking a process that holds model/DB threads is unsafe
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=min(workers, len(to_load)), mp_context=context) as pool:
+                    futures = {pool.submit(_load_and_split, file_path): file_path for file_path in to_load}
+                    for future in as_completed(futures):
+                        file_path = futures[future]
+                        try:
+                            handle(file_path, future.result())
+                        except Exception as e:
+                            errors.append(f"{file_path}: {e}")
+                            progress(len(updates) + len(errors), len(to_load))
+                        write_batches()
+            
+            write_batches(final=True)
+            self.vector_db.persist()
+        except Exception as e:
+            # Manifest is left untouched, so a rerun redoes these files
+            # (chunks already written are upserted again under the same ids)
+            self.dedup_index = self._build_dedup_index()
+            return f"Error during bulk ingestion: {str(e)}"
+        
+        self.documents.update(updates)
+        self._save_manifest()
+        reingested = self._reingest_dependents(removed_ids)
+        
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        ingested = len(updates)
+        summary = (
+            f"Ingested {ingested} of {len(files)} files ({len(files) - len(to_load)} unchanged, "
+            f"{len(errors)} failed): {total_chunks} chunks ({new_count} new, {stale_count} stale removed, "
+            f"{dup_count} near-duplicates skipped, {self.embeddings.misses - misses_before} embedded) in {elapsed:.1f}s "
+            f"({ingested / elapsed:.1f} files/s, {total_chunks / elapsed:.0f} chunks/s)."
+        )
+        if reingested:
+            summary += f"\nRe-ingested {len(reingested)} documents that deduplicated against removed chunks."
+        if errors:
+            summary += "\nFailures:\n" + "\n".join(errors[:20])
+        return summary
+
     def query(self, query_text: str, n_results: int = 3) -> str:
         """
         Search the knowledge base for relevant context.
+        Repeated (normalized) queries are served from memory until the
+        next change to the knowledge base, made here or by another process
+        sharing the store.
         """
-        if not self.vector_db:
+        if self.vector_db is None:
              return "Error: Knowledge Base not initialized."
 
+        normalized = _normalize_query(query_text)
+        key = (normalized, n_results)
+        
+        store_version = self.vector_db.version()
+        with self._cache_lock:
+            version = (self.generation, store_version)
+            cached = self._query_cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._query_cache.move_to_end(key)
+                return cached[1]
+            embedding = self._query_embeddings.get(normalized)
+
         try:
-            results = self.vector_db.similarity_search(query_text, k=n_results)
+            # Query embeddings don't depend on KB contents, so they survive changes
+            if embedding is None:
+                embedding = self.embeddings.embed_query(normalized)
+                _lru_put(self._query_embeddings, normalized, embedding, self._cache_lock)
+            
+            results = self.vector_db.similarity_search_by_vector(embedding, k=n_results)
             
             if not results:
-                return "No relevant information found in knowledge base."
+                context = "No relevant information found in knowledge base."
+            else:
+                # Format results
+                context = "\n\n".join([f"[Source: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}" for doc in results])
             
-            # Format results
-            context = "\n\n".join([f"[Source: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}" for doc in results])
+            _lru_put(self._query_cache, key, (version, context), self._cache_lock)
             return context
             
         except Exception as e:
@@ -99,20 +364,346 @@ class KnowledgeBase:
             
     def clear(self):
         """Clear the entire knowledge base."""
+        self.documents = {}
+        self.dedup_index = self._build_dedup_index()
+        self._bump_generation()
         if os.path.exists(PERSIST_DIRECTORY):
             shutil.rmtree(PERSIST_DIRECTORY)
+            if self.vector_db is not None:
+                self.vector_db.reset()
             return "Knowledge base cleared."
         return "Knowledge base was already empty."
 
-    def _get_loader(self, file_path: str):
-        """Return appropriate loader based on file extension."""
-        from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
-        
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext == ".pdf":
-            return PyPDFLoader(file_path)
-        elif ext == ".txt":
-            return TextLoader(file_path)
-        elif ext == ".md":
-            return UnstructuredMarkdownLoader(file_path)
-        return None
+    def dedup_reports(self) -> List[dict]:
+        """
+        Near-duplicate report for every ingested document.
+        
+        Returns:
+            list: {"source", "chunks", "dedup"} per document (dedup is None
+                for documents ingested with dedup disabled)
+        """
+        # Snapshot (a single C-level copy) since ingestion threads insert into
+        # the manifest; the write lock would block for a whole ingest
+        documents = list(self.documents.items())
+        return [
+            {"source": source, "chunks": len(record["chunk_ids"]), "dedup": record.get("dedup")}
+            for source, record in sorted(documents)
+        ]
+
+    def _plan_update(self, file_path: str, chunks: List[Tuple[str, dict]], deduper: Optional[DocumentDeduper] = None):
+        """
+        Diff a file's freshly split chunks against what is stored for it.
+        
+        Returns:
+            tuple: (chunk_ids in document order, {id: (text, metadata)} to add,
+                set of stale ids to delete)
+        """
+        old_ids = self._stored_ids(file_path)
+        chunk_ids = []
+        new_chunks = {}
+        for chunk_id, text, metadata in self._select_chunks(file_path, chunks, old_ids, deduper):
+            chunk_ids.append(chunk_id)
+            if chunk_id not in old_ids:
+                new_chunks[chunk_id] = (text, metadata)
+        
+        stale_ids = old_ids - set(chunk_ids)
+        return chunk_ids, new_chunks, stale_ids
+
+    def _select_chunks(self, file_path: str, chunks, old_ids: set, deduper: Optional[DocumentDeduper]):
+        """
+        Yield (chunk_id, text, metadata) for the chunks of a document worth
+        storing: exact repeats are dropped, and new chunks that nearly
+        duplicate stored ones are skipped when dedup is enabled.
+        """
+        seen = set()
+        for text, metadata in chunks:
+            chunk_id = _chunk_id(file_path, text)
+            if chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+            if deduper and not deduper.keep(chunk_id, text, is_new=chunk_id not in old_ids):
+                continue
+            yield chunk_id, text, metadata
+
+    def _deduper(self, file_path: str) -> Optional[DocumentDeduper]:
+        """Start a dedup pass for one document (None when disabled)."""
+        if self.dedup_index is None:
+            return None
+        return DocumentDeduper(self.dedup_index, file_path)
+
+    def _document_record(self, file_hash: str, chunk_ids: List[str], deduper: Optional[DocumentDeduper]) -> dict:
+        """
+        Manifest entry for an ingested document. Fingerprints are published
+        to the shared index here so later documents dedupe against this one.
+        """
+        record = {"file_hash": file_hash, "chunk_ids": chunk_ids}
+        if deduper:
+            self.dedup_index.replace_source(deduper.source, deduper.fingerprints)
+            record["fingerprints"] = [deduper.fingerprints[chunk_id] for chunk_id in chunk_ids]
+            record["canonical_ids"] = sorted(deduper.canonical_ids)
+            record["dedup"] = deduper.report()
+        return record
+
+    def _reingest_dependents(self, removed_ids: set) -> List[str]:
+        """
+        Re-ingest documents that skipped chunks as near-duplicates of chunks
+        now removed, so their content is stored again. Their manifest hash
+        is cleared first: if re-ingesting fails, the next add retries.
+        
+        Returns:
+            list: Sources that were re-ingested
+        """
+        if not removed_ids:
+            return []
+        
+        dependents = [
+            source for source, record in self.documents.items()
+            if removed_ids.intersection(record.get("canonical_ids", ()))
+        ]
+        for source in dependents:
+            self.documents[source]["file_hash"] = None
+        if dependents:
+            self._save_manifest()
+        
+        for source in dependents:
+            result = self._add_document(source)
+            if result.startswith("Error"):
+                print(f"Warning: Could not re-ingest '{source}': {result}")
+        return dependents
+
+    def _build_dedup_index(self) -> Optional[NearDuplicateIndex]:
+        """Load stored chunk fingerprints from the manifest."""
+        if not DEDUP_ENABLED:
+            return None
+        index = NearDuplicateIndex(DEDUP_THRESHOLD)
+        for source, record in self.documents.items():
+            for chunk_id, fingerprint in zip(record["chunk_ids"], record.get("fingerprints", ())):
+                index.add(chunk_id, fingerprint, source)
+        return index
+
+    def _stored_ids(self, file_path: str) -> set:
+        """Chunk ids currently stored for a document."""
+        record = self.documents.get(file_path)
+        if record:
+            return set(record["chunk_ids"])
+        # Vectors ingested before documents were tracked have random ids
+        return set(self.vector_db.get_ids(source=file_path))
+
+    def _add_chunks(self, chunks: Dict[str, Tuple[str, dict]]):
+        """Embed and write chunks in one vector store call."""
+        ids = list(chunks)
+        self.vector_db.add_texts(
+            texts=[chunks[chunk_id][0] for chunk_id in ids],
+            metadatas=[chunks[chunk_id][1] for chunk_id in ids],
+            ids=ids
+        )
+        self._bump_generation()
+
+    def _delete_chunks(self, ids):
+        """Remove chunks from the vector store."""
+        self.vector_db.delete(list(ids))
+        self._bump_generation()
+
+    def _bump_generation(self):
+        """Invalidate cached recall results after any change to the store."""
+        with self._cache_lock:
+            self.generation += 1
+            self._query_cache.clear()
+
+    def _load_manifest(self) -> dict:
+        """Read the per-document manifest (empty if none yet)."""
+        path = os.path.join(PERSIST_DIRECTORY, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable manifest {path}: {e}")
+            return {}
+
+    def _save_manifest(self):
+        """Write the manifest atomically."""
+        os.makedirs(PERSIST_DIRECTORY, exist_ok=True)
+        path = os.path.join(PERSIST_DIRECTORY, MANIFEST_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.documents, f)
+        os.replace(tmp_path, path)
+
+# Singleton instance to share DB connection across tool calls. Kept here
+# rather than in tools/knowledge.py, which the tool hot-reloader may re-import.
+_kb_instance = None
+_kb_lock = threading.Lock()
+
+def get_kb() -> KnowledgeBase:
+    """Shared KnowledgeBase for the process (built on first use)."""
+    global _kb_instance
+    if _kb_instance is None:
+        # Tool calls may run in parallel threads; only one should build the KB
+        with _kb_lock:
+            if _kb_instance is None:
+                _kb_instance = KnowledgeBase()
+    return _kb_instance
+
+
+def _get_loader(file_path: str):
+    """Return appropriate loader based on file extension."""
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
+    
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        return PyPDFLoader(file_path)
+    elif ext == ".txt":
+        return TextLoader(file_path)
+    elif ext == ".md":
+        return UnstructuredMarkdownLoader(file_path)
+    return None
+
+
+def _iter_chunks(file_path: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (text, metadata) chunks without materializing the whole file.
+    Text files are read in READ_BLOCK_SIZE blocks; other formats are split
+    one loaded page/element at a time.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    
+    if os.path.splitext(file_path)[1].lower() == ".txt":
+        metadata = {"source": file_path}
+        buffer = ""
+        with open(file_path, encoding="utf-8") as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), ""):
+                buffer += block
+                pieces = text_splitter.split_text(buffer)
+                if len(pieces) > 1:
+                    for piece in pieces[:-1]:
+                        yield piece, dict(metadata)
+                    # The last piece may continue in the next block; re-split it
+                    # with what follows (keeping its trailing whitespace)
+                    buffer = buffer[buffer.rfind(pieces[-1]):]
+        for piece in text_splitter.split_text(buffer):
+            yield piece, dict(metadata)
+        return
+    
+    loader = _get_loader(file_path)
+    if loader is None:
+        raise ValueError(f"Unsupported file type for '{file_path}'")
+    
+    for document in loader.lazy_load():
+        for chunk in text_splitter.split_documents([document]):
+            yield chunk.page_content, chunk.metadata
+
+
+def _load_and_split(file_path: str) -> List[Tuple[str, dict]]:
+    """
+    Load and chunk one file. Module-level so it can run in worker processes.
+    Uses the same splitting as _iter_chunks so chunk ids match either path.
+    
+    Returns:
+        list: (text, metadata) per chunk
+    """
+    return list(_iter_chunks(file_path))
+
+
+def _prefetch(iterator: Iterator, depth: int) -> Iterator:
+    """
+    Run a generator in a background thread, at most depth items ahead.
+    Exceptions are re-raised in the consumer.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+    
+    thread = threading.Thread(target=produce, daemon=True, name="kb-prefetch")
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Consumer stopped early (error or generator closed): release the producer
+        stop.set()
+
+
+def _resolve_files(path: str) -> List[str]:
+    """Expand a directory (recursively) or glob pattern into supported files."""
+    if os.path.isdir(path):
+        pattern = os.path.join(path, "**", "*")
+    else:
+        pattern = path
+    
+    return sorted(
+        os.path.abspath(match)
+        for match in glob.glob(pattern, recursive=True)
+        if os.path.isfile(match) and os.path.splitext(match)[1].lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def _dedup_summary(deduper: Optional[DocumentDeduper]) -> str:
+    """Suffix for ingestion messages"""
+    if not deduper:
+        return ""
+    return f", {deduper.skipped} near-duplicates skipped"
+
+
+def _reingest_summary(reingested: List[str]) -> str:
+    """Suffix for ingestion messages"""
+    if not reingested:
+        return ""
+    return f", {len(reingested)} dependent documents re-ingested"
+
+
+def _normalize_query(text: str) -> str:
+    """Case/whitespace-insensitive form of a recall query (the embedding model is uncased)"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _lru_put(cache: OrderedDict, key, value, lock: threading.Lock):
+    """Insert into a bounded LRU dict"""
+    with lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _hash_file(file_path: str) -> str:
+    """sha256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _chunk_id(file_path: str, text: str) -> str:
+    """Stable vector id for a chunk of a given document"""
+    return f"{content_hash(file_path)[:16]}-{content_hash(text)}"
@@ -0,0 +1,161 @@
+"""Opt-in persistent cache of LLM responses keyed on request fingerprint"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def request_fingerprint(model: str, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]], tool_choice: Optional[str]) -> str:
+    """
+    Canonical hash of everything that determines the provider's response.
+
+    Returns:
+        str: sha256 hex digest
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": tool_choice
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache: an in-memory LRU in front of a SQLite file.
+    Entries expire after ttl seconds; both tiers are size-bounded.
+    Values are the engine's normalized (content, tool_calls) responses.
+    """
+
+    def __init__(self, path: str = None, ttl: float = None, memory_entries: int = None, max_entries: int = None):
+        """
+        Initialize cache tiers.
+
+        Args:
+            path: SQLite file (defaults to LLM_CACHE_PATH or ./llm_cache.db)
+            ttl: Seconds an entry stays valid (defaults to LLM_CACHE_TTL or 86400)
+            memory_entries: In-memory LRU size (defaults to LLM_CACHE_MEMORY_ENTRIES or 512)
+            max_entries: On-disk entry cap (defaults to LLM_CACHE_MAX_ENTRIES or 10000)
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "86400"))
+        self.memory_entries = memory_entries or int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response, promoting disk hits into memory.
+
+        Returns:
+            dict: {"content", "tool_calls"} or None on miss/expiry
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a response in both tiers."""
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, now, value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+
+            # Evict in batches rather than on every write
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._writes_since_evict = 0
+                self._evict(now)
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the process."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory)
+        }
+
+    def _remember(self, key: str, created_at: float, value: Dict[str, Any]):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float):
+        """Drop expired rows, then least recently used rows over max_entries."""
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+
+# Process-wide cache, created on first use when enabled
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the shared cache, or None unless LLM_CACHE is enabled."""
+    global _cache_instance
+    if os.getenv("LLM_CACHE", "false").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = LLMResponseCache()
+    return _cache_instance
@@ -0,0 +1,64 @@
+"""Shared async LLM client with connection pooling"""
+import os
+import threading
+import httpx
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared clients keyed by base URL so every request reuses pooled connections
+_clients: dict = {}
+_clients_lock = threading.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Create an httpx client with keep-alive pool limits from the environment."""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+    )
+    timeout = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "120")), connect=10.0)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_llm_client(base_url: str = None, api_key: str = None) -> AsyncOpenAI:
+    """
+    Get the process-wide async client for a base URL.
+
+    Args:
+        base_url: Provider base URL (defaults to API_BASE_URL)
+        api_key: API key (defaults to API_KEY)
+
+    Returns:
+        AsyncOpenAI: Shared client backed by a pooled httpx client
+    """
+    base_url = base_url or os.getenv("API_BASE_URL")
+
+    client = _clients.get(base_url)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=api_key or os.getenv("API_KEY"),
+                base_url=base_url,
+                http_client=_build_http_client(),
+                # Retries/backoff are handled per model by the agent engine
+                max_retries=0
+            )
+            _clients[base_url] = client
+    return client
+
+
+async def close_llm_clients():
+    """Close all pooled clients (call on application shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        await client.close()
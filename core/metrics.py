@@ -0,0 +1,128 @@
+"""
+Process-level metrics in Prometheus text exposition format.
+Minimal histogram/counter implementations so no client library is needed.
+"""
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {bucket_count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LLM_LATENCY = Histogram(
+    "agent_llm_request_duration_seconds",
+    "Wall time of LLM completion calls (cache hits excluded)",
+    labels=("model",),
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "agent_llm_tokens_total",
+    "Tokens reported by the LLM provider",
+    labels=("model", "type")
+)
+LLM_RETRIES = Counter(
+    "agent_llm_retries_total",
+    "LLM calls retried after a rate limit or transient error",
+    labels=("model", "reason")
+)
+LLM_QUEUE_WAIT = Histogram(
+    "agent_llm_queue_wait_seconds",
+    "Time LLM calls waited for a per-model rate limit slot",
+    labels=("model",),
+    buckets=LATENCY_BUCKETS
+)
+TOOL_LATENCY = Histogram(
+    "agent_tool_duration_seconds",
+    "Wall time of tool executions",
+    labels=("tool",),
+    buckets=LATENCY_BUCKETS
+)
+RUN_ITERATIONS = Histogram(
+    "agent_run_iterations",
+    "LLM iterations per agent run",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30)
+)
+
+REGISTRY = [LLM_LATENCY, LLM_TOKENS, LLM_RETRIES, LLM_QUEUE_WAIT, TOOL_LATENCY, RUN_ITERATIONS]
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
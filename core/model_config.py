@@ -2,6 +2,7 @@
 Model Configuration
 Define available models and their backend IDs here.
 """
+import os
 
 # Dictionary mapping display names to backend model IDs
 MODEL_MAPPINGS = {
@@ -18,9 +19,57 @@ MODEL_MAPPINGS = {
     "Claude Haiku 4.5": "protected.Claude-Haiku-4.5",
 }
 
+# Prompt token budget per model for context compaction (display name -> tokens).
+# Models not listed use CONTEXT_TOKEN_BUDGET.
+MODEL_CONTEXT_BUDGETS = {
+    "Claude Sonnet 4.5": 48000,
+    "GPT-5.1": 48000,
+    "Gemini 2.5 Pro": 48000,
+    "Claude Opus 4.1": 48000,
+    "Gemini 2.5 Flash Lite": 16000,
+    "Gemini 2.5 Flash": 24000,
+    "Claude Haiku 4.5": 24000,
+}
+
+DEFAULT_CONTEXT_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "32000"))
+
+# Request limits per model (display name -> overrides of DEFAULT_MODEL_LIMITS).
+# 0 means unlimited.
+#   max_concurrency: in-flight requests from this process
+#   rpm / tpm: requests / tokens per minute
+MODEL_LIMITS = {
+    "Claude Opus 4.1": {"max_concurrency": 4},
+    "Gemini 2.5 Pro": {"max_concurrency": 4},
+    # "GPT-5.1": {"max_concurrency": 8, "rpm": 500, "tpm": 200000},
+}
+
+DEFAULT_MODEL_LIMITS = {
+    "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    "rpm": int(os.getenv("LLM_RPM", "0")),
+    "tpm": int(os.getenv("LLM_TPM", "0")),
+}
+
 # Default model if none selected
 DEFAULT_MODEL = "Gemini 2.5 Flash"
 
 def get_model_id(display_name: str) -> str:
     """Get backend ID for a display name, or return default."""
     return MODEL_MAPPINGS.get(display_name, MODEL_MAPPINGS[DEFAULT_MODEL])
+
+
+def get_display_name(model_id: str) -> str:
+    """Display name for a backend model ID (None if not configured)."""
+    for display_name, backend_id in MODEL_MAPPINGS.items():
+        if backend_id == model_id:
+            return display_name
+    return None
+
+
+def get_context_budget(model_id: str) -> int:
+    """Prompt token budget for a backend model ID."""
+    return MODEL_CONTEXT_BUDGETS.get(get_display_name(model_id), DEFAULT_CONTEXT_BUDGET)
+
+
+def get_model_limits(model_id: str) -> dict:
+    """Request limits (max_concurrency, rpm, tpm) for a backend model ID."""
+    return {**DEFAULT_MODEL_LIMITS, **MODEL_LIMITS.get(get_display_name(model_id), {})}
@@ -0,0 +1,239 @@
+"""Per-model request limiting and retry policy for LLM calls"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from core.model_config import get_model_limits
+
+QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))  # max seconds a request waits for a slot
+POLL_INTERVAL = 0.05
+RETRYABLE_STATUS = {408, 409, 429}  # plus any 5xx
+
+
+class LimiterTimeout(Exception):
+    """Raised when a request waited longer than LLM_QUEUE_TIMEOUT for a slot."""
+
+
+class _Waiter:
+    """A queued acquire: granted under the limiter lock, woken on its own loop."""
+
+    __slots__ = ("tokens", "loop", "future", "granted")
+
+    def __init__(self, tokens: int, loop: asyncio.AbstractEventLoop):
+        self.tokens = tokens
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelLimiter:
+    """
+    Caps in-flight requests and requests/tokens per minute for one model.
+
+    Per-minute limits are token buckets refilled continuously; requests
+    that don't fit wait (queue) instead of failing. Waiters are served
+    first-in, first-out: a freed slot goes to the oldest waiter, woken by
+    release() on its own event loop, so one limiter works for every loop
+    in the process and an early request can't keep losing the race.
+    """
+
+    def __init__(self, max_concurrency: int = 0, rpm: int = 0, tpm: int = 0):
+        """
+        Args:
+            max_concurrency: Max in-flight requests (0 = unlimited)
+            rpm: Requests per minute (0 = unlimited)
+            tpm: Tokens per minute (0 = unlimited)
+        """
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+
+        self.in_flight = 0
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens: int = 0, timeout: float = None) -> float:
+        """
+        Wait for a slot (in arrival order) and reserve an estimated token count.
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            LimiterTimeout: If no slot frees up within timeout
+        """
+        timeout = QUEUE_TIMEOUT if timeout is None else timeout
+        started = time.monotonic()
+        waiter = _Waiter(tokens, asyncio.get_running_loop())
+
+        with self._lock:
+            self._waiters.append(waiter)
+            wait = self._dispatch()
+
+        try:
+            while not waiter.granted:
+                remaining = started + timeout - time.monotonic()
+                if remaining <= 0:
+                    raise LimiterTimeout(f"No request slot available within {timeout:.0f}s")
+                # release() wakes us; the head also re-checks when per-minute
+                # buckets refill or a pause ends, which nothing signals
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=min(remaining, max(wait, 0.01), 1.0))
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    wait = self._dispatch()
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    # Granted just as we gave up (timeout or cancellation): hand it back
+                    self.in_flight -= 1
+                    if self.rpm:
+                        self._requests += 1
+                    if self.tpm:
+                        self._tokens += tokens
+                else:
+                    self._waiters.remove(waiter)
+                self._dispatch()
+            raise
+
+        return time.monotonic() - started
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None):
+        """Free the slot, correct the token reservation with real usage and wake the next waiter."""
+        with self._lock:
+            self.in_flight -= 1
+            if self.tpm and actual_tokens is not None:
+                self._tokens -= actual_tokens - estimated_tokens
+            self._dispatch()
+
+    def pause(self, seconds: float):
+        """Hold all requests for this model (provider asked us to back off)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _dispatch(self) -> float:
+        """
+        Grant slots to waiters in arrival order while the oldest one fits.
+        Call with the lock held.
+
+        Returns:
+            float: Seconds until the oldest remaining waiter could start (0 if none)
+        """
+        while self._waiters:
+            waiter = self._waiters[0]
+            wait = self._wait_time(waiter.tokens)
+            if wait > 0:
+                return wait
+            self._waiters.popleft()
+            self.in_flight += 1
+            if self.rpm:
+                self._requests -= 1
+            if self.tpm:
+                self._tokens -= waiter.tokens
+            waiter.granted = True
+            try:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            except RuntimeError:
+                pass  # its loop is closed; the waiter is gone with it
+        return 0.0
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until a request of this size could start (<= 0: now)."""
+        now = time.monotonic()
+        self._refill(now)
+
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return POLL_INTERVAL
+
+        wait = 0.0
+        if self.rpm and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            # A request bigger than the whole bucket only needs a full bucket
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60 / self.tpm)
+        return wait
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+
+_limiters: Dict[str, ModelLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model_id: str) -> ModelLimiter:
+    """Process-wide limiter for a backend model ID (limits from model_config)."""
+    limiter = _limiters.get(model_id)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(model_id)
+            if limiter is None:
+                limiter = ModelLimiter(**get_model_limits(model_id))
+                _limiters[model_id] = limiter
+    return limiter
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms), if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, connection errors and 5xx responses."""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # includes timeouts
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for a 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
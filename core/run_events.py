@@ -0,0 +1,81 @@
+"""In-process pub/sub of step events for in-flight runs"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class RunEventBus:
+    """
+    Fans out step events from RunTracker to live subscribers.
+    Keeps each in-flight run's events in memory so late subscribers can
+    catch up without reading the DB; the backlog is dropped when the run
+    is closed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backlogs: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def open(self, run_id: str):
+        """Start buffering events for a run."""
+        with self._lock:
+            self._backlogs.setdefault(run_id, [])
+
+    def publish(self, run_id: str, event: str, data: Dict[str, Any]):
+        """
+        Publish an event to every subscriber of a run.
+        Safe to call from any thread.
+        """
+        with self._lock:
+            backlog = self._backlogs.get(run_id)
+            if backlog is None:
+                return
+            backlog.append((event, data))
+            subscribers = list(self._subscribers.get(run_id, []))
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def close(self, run_id: str, data: Dict[str, Any]):
+        """
+        Publish the final status event, end all subscriptions and drop the backlog.
+        """
+        self.publish(run_id, "status", data)
+
+        with self._lock:
+            self._backlogs.pop(run_id, None)
+            subscribers = self._subscribers.pop(run_id, [])
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def subscribe(self, run_id: str) -> Optional[Tuple[List[Tuple[str, Dict[str, Any]]], asyncio.Queue]]:
+        """
+        Subscribe to a run from within a running event loop.
+
+        Returns:
+            tuple: (backlog, queue) where backlog holds events published so
+                far and queue receives later ones, ending with None.
+                None if the run is not in flight in this process.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        with self._lock:
+            backlog = self._backlogs.get(run_id)
+            if backlog is None:
+                return None
+            self._subscribers.setdefault(run_id, []).append((loop, queue))
+            return list(backlog), queue
+
+    def unsubscribe(self, run_id: str, queue: asyncio.Queue):
+        """Remove a subscriber (e.g. when the client disconnects)."""
+        with self._lock:
+            subscribers = self._subscribers.get(run_id)
+            if subscribers:
+                self._subscribers[run_id] = [s for s in subscribers if s[1] is not queue]
+
+
+# Shared bus for the process
+run_events = RunEventBus()
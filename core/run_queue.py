@@ -0,0 +1,334 @@
+"""
+Durable queue of agent runs submitted for background execution.
+
+Jobs live in a SQLite file, so queued and interrupted runs survive a
+restart. Workers hold a lease on the job they are executing and renew it
+while it runs; a job whose lease expired (its worker died) is claimed
+again and the run is re-executed from the start, keeping earlier steps.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from models.database import SessionLocal
+from models.run import Run
+
+
+class RunQueue:
+    """SQLite-backed job table with lease-based claiming (safe across processes)."""
+
+    def __init__(self, path: str = None, lease: float = None, max_attempts: int = None):
+        """
+        Args:
+            path: SQLite file (defaults to RUN_QUEUE_PATH or ./run_queue.db)
+            lease: Seconds a claim stays valid without renewal (defaults to
+                RUN_QUEUE_LEASE or 60)
+            max_attempts: Claims before a job is given up as failed (defaults
+                to RUN_QUEUE_MAX_ATTEMPTS or 3)
+        """
+        self.path = path or os.getenv("RUN_QUEUE_PATH", "./run_queue.db")
+        self.lease = lease or float(os.getenv("RUN_QUEUE_LEASE", "60"))
+        self.max_attempts = max_attempts or int(os.getenv("RUN_QUEUE_MAX_ATTEMPTS", "3"))
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_jobs ("
+            "run_id TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, lease_until REAL, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_run_jobs_status_created_at ON run_jobs (status, created_at)")
+
+    def enqueue(self, run_id: str, payload: Dict[str, Any]):
+        """Add a job for an already created Run."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO run_jobs (run_id, payload, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                (run_id, json.dumps(payload), now, now)
+            )
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest queued job, or one whose lease expired.
+
+        Returns:
+            dict: {"run_id", "payload", "attempts"} or None if nothing is ready
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT run_id, payload, attempts FROM run_jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                run_id, payload, attempts = row
+                self._conn.execute(
+                    "UPDATE run_jobs SET status = 'running', attempts = ?, worker = ?, "
+                    "lease_until = ?, updated_at = ? WHERE run_id = ?",
+                    (attempts + 1, worker, now + self.lease, now, run_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return {"run_id": run_id, "payload": json.loads(payload), "attempts": attempts + 1}
+
+    def renew(self, run_id: str, worker: str, attempt: int) -> bool:
+        """
+        Extend the lease on a job this worker is executing.
+
+        Returns:
+            bool: False if the job was claimed again meanwhile (lease lost)
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE run_jobs SET lease_until = ?, updated_at = ? "
+                "WHERE run_id = ? AND worker = ? AND attempts = ? AND status = 'running'",
+                (now + self.lease, now, run_id, worker, attempt)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, run_id: str, status: str, error: str = None):
+        """Record a finished job (status: completed or failed)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE run_jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM run_jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class RunWorkerPool:
+    """Async workers that execute queued runs on the server's event loop."""
+
+    def __init__(self, queue: RunQueue, workers: int = None, poll_interval: float = None):
+        """
+        Args:
+            queue: Job queue to consume
+            workers: Concurrent runs (defaults to RUN_WORKERS or 2)
+            poll_interval: Idle seconds between claims (defaults to RUN_QUEUE_POLL or 1)
+        """
+        self.queue = queue
+        self.workers = workers or int(os.getenv("RUN_WORKERS", "2"))
+        self.poll_interval = poll_interval or float(os.getenv("RUN_QUEUE_POLL", "1"))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the workers (call from the running event loop)."""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Cancel the workers. Interrupted jobs keep their 'running' state and
+        are picked up again once their lease expires.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a submit."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+            except Exception as e:
+                print(f"Warning: Run queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._execute(job)
+            except Exception as e:
+                # Keep the worker alive, and don't let the lease lapse into a re-run
+                print(f"Warning: Run {job['run_id']} failed in the run worker: {e}")
+                await self._give_up(job["run_id"], f"Run worker error: {e}")
+
+    async def _give_up(self, run_id: str, reason: str):
+        """Mark a job (and its run, unless already finalized) failed; never raises."""
+        try:
+            await asyncio.to_thread(self.queue.complete, run_id, "failed", reason)
+        except Exception as e:
+            print(f"Warning: Could not mark job {run_id} failed: {e}")
+        try:
+            await asyncio.to_thread(_fail_run, run_id, reason)
+        except Exception as e:
+            print(f"Warning: Could not mark run {run_id} failed: {e}")
+
+    async def _execute(self, job: Dict[str, Any]):
+        run_id = job["run_id"]
+        payload = job["payload"]
+
+        if job["attempts"] > self.queue.max_attempts:
+            await asyncio.to_thread(_fail_run, run_id, f"Gave up after {self.queue.max_attempts} interrupted attempts")
+            await asyncio.to_thread(self.queue.complete, run_id, "failed", "too many attempts")
+            return
+
+        execution = asyncio.create_task(execute_run(run_id, payload, resumed=job["attempts"] > 1))
+        heartbeat = asyncio.create_task(self._heartbeat(run_id, job["attempts"], execution))
+        try:
+            status, error = await execution
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                # The worker itself is being stopped
+                execution.cancel()
+                raise
+            # Lease lost: another worker owns the run now, leave it alone
+            print(f"Warning: Lost lease on run {run_id}; abandoned")
+            return
+        finally:
+            heartbeat.cancel()
+
+        await asyncio.to_thread(self.queue.complete, run_id, status, error)
+
+    async def _heartbeat(self, run_id: str, attempt: int, execution: asyncio.Task):
+        """Renew the lease while the run executes; cancel the run if it is lost."""
+        while True:
+            await asyncio.sleep(self.queue.lease / 3)
+            try:
+                held = await asyncio.to_thread(self.queue.renew, run_id, self.worker_id, attempt)
+            except Exception as e:
+                print(f"Warning: Run queue lease renewal failed: {e}")
+                continue
+            if not held:
+                execution.cancel()
+                return
+
+
+async def execute_run(run_id: str, payload: Dict[str, Any], resumed: bool = False):
+    """
+    Execute a queued run.
+
+    Args:
+        run_id: Run created at submit time
+        payload: {"message", "model", "tools"}
+        resumed: The run was interrupted before (keep its steps, continue numbering)
+
+    Returns:
+        tuple: (job status, error message or None)
+    """
+    # Imported here: the engine pulls in the tool registry and LLM client
+    from core.agent_engine import AgentEngine
+    from core.run_tracker import RunTracker
+    from core.tool_registry import get_registry
+
+    db = SessionLocal()
+    try:
+        run = db.query(Run).filter(Run.id == run_id).first()
+        if run is None:
+            return "failed", "run was deleted"
+
+        was_running = run.status == "running"
+        run.status = "running"
+        db.commit()
+
+        tracker = RunTracker(run, resumed=resumed and was_running)
+        if resumed:
+            tracker.add_step({
+                'type': 'agent-thought',
+                'content': "Resuming interrupted run from the start"
+            })
+
+        engine = AgentEngine(
+            tracker=tracker,
+            tool_registry=get_registry(),
+            model_id=payload.get("model")
+        )
+        try:
+            await engine.run(payload["message"], allowed_tools=payload.get("tools"))
+        except asyncio.CancelledError:
+            # Shutdown: leave the run and job as running so they are resumed
+            raise
+        except Exception as e:
+            await tracker.finalize_async("failed")
+            db.commit()
+            return "failed", str(e)
+        finally:
+            # Shutdown or lost lease: end live event streams, the run resumes later
+            tracker.close()
+
+        await tracker.finalize_async("completed")
+        db.commit()
+        return "completed", None
+    finally:
+        db.close()
+
+
+def _fail_run(run_id: str, reason: str):
+    """Mark a run failed without executing it."""
+    from core.run_tracker import RunTracker
+
+    db = SessionLocal()
+    try:
+        run = db.query(Run).filter(Run.id == run_id).first()
+        if run is not None and run.status not in ("completed", "failed"):
+            tracker = RunTracker(run, resumed=run.status == "running")
+            tracker.add_step({'type': 'agent-response', 'content': reason})
+            tracker.finalize("failed")
+            db.commit()
+    finally:
+        db.close()
+
+
+# Created on first use so importing this module never touches the filesystem
+_queue: Optional[RunQueue] = None
+_pool: Optional[RunWorkerPool] = None
+_queue_lock = threading.Lock()
+_pool_lock = threading.Lock()
+
+
+def get_run_queue() -> RunQueue:
+    """Shared run queue for the process."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = RunQueue()
+    return _queue
+
+
+def get_worker_pool() -> RunWorkerPool:
+    """Shared worker pool for the process (not started until start())."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RunWorkerPool(get_run_queue())
+    return _pool
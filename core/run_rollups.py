@@ -0,0 +1,147 @@
+"""Incremental maintenance of RunRollup counters"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from models.rollup import RunRollup, TOTAL_BUCKET
+from models.run import Run
+
+# (dimension, key) -> (count delta, duration_ms delta)
+Deltas = Dict[Tuple[str, str], Tuple[int, int]]
+
+
+def bucket_for(timestamp: datetime) -> str:
+    """Hourly time bucket for a timestamp"""
+    return timestamp.strftime("%Y-%m-%dT%H:00")
+
+
+def apply_deltas(db: Session, timestamp: datetime, deltas: Deltas):
+    """
+    Add deltas to both the all-time and the hourly rollup rows.
+    Changes are left in the session for the caller to commit.
+    """
+    rows = [
+        {"bucket": bucket, "dimension": dim, "key": key, "count": count, "duration_ms": duration_ms}
+        for bucket in (TOTAL_BUCKET, bucket_for(timestamp))
+        for (dim, key), (count, duration_ms) in deltas.items()
+    ]
+    
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # Atomic upsert so concurrent finalizes never race on new rows
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        
+        stmt = insert(RunRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket", "dimension", "key"],
+            set_={
+                "count": RunRollup.count + stmt.excluded.count,
+                "duration_ms": RunRollup.duration_ms + stmt.excluded.duration_ms
+            }
+        )
+        db.execute(stmt)
+        return
+    
+    for values in rows:
+        row = db.get(RunRollup, (values["bucket"], values["dimension"], values["key"]))
+        if row is None:
+            db.add(RunRollup(**values))
+        else:
+            row.count += values["count"]
+            row.duration_ms += values["duration_ms"]
+
+
+def record_run_started(db: Session, run: Run):
+    """Count a new run as running."""
+    apply_deltas(db, run.created_at or datetime.now(), {("status", "running"): (1, 0)})
+
+
+def record_run_finalized(db: Session, run: Run, tool_counts: Dict[str, int]):
+    """
+    Move a run from running to its final status and count its model and tools.
+    
+    Args:
+        db: Session the run belongs to
+        run: Finalized run (status, model, duration_ms set)
+        tool_counts: Number of calls per tool name during the run
+    """
+    duration_ms = run.duration_ms or 0
+    deltas: Deltas = {
+        ("status", "running"): (-1, 0),
+        ("status", run.status): (1, duration_ms),
+    }
+    if run.model:
+        deltas[("model", run.model)] = (1, duration_ms)
+    for tool_name, count in tool_counts.items():
+        deltas[("tool", tool_name)] = (count, 0)
+    
+    apply_deltas(db, run.created_at or datetime.now(), deltas)
+
+
+def record_run_deleted(db: Session, run: Run):
+    """
+    Remove a deleted run from the counters it contributed to.
+    
+    Args:
+        db: Session the run is deleted in (commit together)
+        run: Run about to be deleted (steps still loaded)
+    """
+    if run.status == "queued":
+        # Only counted once a worker starts it
+        return
+    
+    deltas: Deltas = {("status", run.status): (-1, -(run.duration_ms or 0))}
+    if run.status != "running":
+        # Model and tools are counted at finalize
+        if run.model:
+            deltas[("model", run.model)] = (-1, -(run.duration_ms or 0))
+        tool_counts: Dict[str, int] = {}
+        for step in run.steps:
+            if step.type == "tool-call":
+                tool_name = (step.content or {}).get("toolName")
+                tool_counts[tool_name] = tool_counts.get(tool_name, 0) + 1
+        for tool_name, count in tool_counts.items():
+            deltas[("tool", tool_name)] = (-count, 0)
+    
+    apply_deltas(db, run.created_at or datetime.now(), deltas)
+
+
+def get_totals(db: Session, dimension: str) -> Dict[str, int]:
+    """All-time counts for one dimension."""
+    rows = db.query(RunRollup).filter(
+        RunRollup.bucket == TOTAL_BUCKET,
+        RunRollup.dimension == dimension
+    )
+    return {row.key: row.count for row in rows}
+
+
+def get_series(db: Session, dimension: str, since: datetime) -> List[RunRollup]:
+    """Hourly rows for one dimension from since onwards, oldest first."""
+    return (
+        db.query(RunRollup)
+        .filter(
+            RunRollup.dimension == dimension,
+            RunRollup.bucket != TOTAL_BUCKET,
+            RunRollup.bucket >= bucket_for(since)
+        )
+        .order_by(RunRollup.bucket, RunRollup.key)
+        .all()
+    )
+
+
+def rebuild_rollups(db: Session):
+    """
+    Backfill rollups from the runs table if none exist yet
+    (databases created before rollups were introduced).
+    """
+    if db.query(RunRollup).first() is not None or db.query(Run).first() is None:
+        return
+    
+    for run in db.query(Run).all():
+        deltas: Deltas = {("status", run.status): (1, run.duration_ms or 0)}
+        if run.model:
+            deltas[("model", run.model)] = (1, run.duration_ms or 0)
+        apply_deltas(db, run.created_at or datetime.now(), deltas)
+    db.commit()
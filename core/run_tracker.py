@@ -1,24 +1,69 @@
 """Run tracking for execution history"""
-from typing import Dict, Any
+import asyncio
+import uuid
+from collections import Counter
+from typing import Dict, Any, Callable, List, Optional
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import object_session
+from models.database import SessionLocal
 from models.run import Run, RunStep
+from core.run_rollups import record_run_started, record_run_finalized
+from core.step_writer import StepWriter, get_step_writer
+from core.run_events import run_events
 
 
 class RunTracker:
     """
     Tracks steps during agent execution.
-    Creates RunStep objects and associates them with a Run.
+    Creates RunStep objects and persists them through the shared
+    write-behind StepWriter (or on the Run itself when disabled).
     """
     
-    def __init__(self, run: Run):
+    def __init__(self, run: Run, writer: Optional[StepWriter] = None, resumed: bool = False):
         """
         Initialize tracker for a specific run.
+        The run must already be committed when write-behind is enabled.
         
         Args:
             run: Run object to track steps for
+            writer: Optional StepWriter override (defaults to the shared one)
+            resumed: The run was started before and interrupted; keep its
+                steps and number new ones after them
         """
         self.run = run
         self.step_order = 0
+        self.tool_counts: Counter = Counter()
+        self.writer = writer or get_step_writer()
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        
+        # Live subscribers (/runs/{id}/events) see steps as they happen;
+        # finalize() or close() ends the stream and frees its backlog
+        self.closed = False
+        run_events.open(run.id)
+        
+        db = SessionLocal()
+        try:
+            if resumed:
+                # Already counted as running when it first started
+                last_order = db.query(func.max(RunStep.order)).filter(RunStep.run_id == run.id).scalar()
+                self.step_order = last_order + 1 if last_order is not None else 0
+            else:
+                # Dashboard rollups count the run as running straight away
+                record_run_started(db, run)
+                db.commit()
+        finally:
+            db.close()
+    
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Register a callback invoked with each step's dict as it is added.
+        Used for streaming steps to clients while the run is in flight.
+        
+        Args:
+            callback: Function receiving the serialized step
+        """
+        self.listeners.append(callback)
     
     def add_step(self, step_data: Dict[str, Any]):
         """
@@ -38,6 +83,7 @@ class RunTracker:
         
         # Create RunStep
         step = RunStep(
+            id=str(uuid.uuid4()),
             run_id=self.run.id,
             type=step_data['type'],
             content=step_data,  # Store entire dict as JSON
@@ -46,21 +92,103 @@ class RunTracker:
         )
         
         self.step_order += 1
-        self.run.steps.append(step)
+        if step.type == 'tool-call':
+            self.tool_counts[step_data.get('toolName')] += 1
+        
+        if self.writer:
+            # Durable mid-run without a commit per step on the hot path
+            self.writer.submit({
+                "id": step.id,
+                "run_id": step.run_id,
+                "type": step.type,
+                "content": step.content,
+                "timestamp": step.timestamp,
+                "order": step.order
+            })
+        else:
+            self.run.steps.append(step)
+        
+        step_dict = step.to_dict()
+        run_events.publish(self.run.id, "step", step_dict)
+        for listener in self.listeners:
+            listener(step_dict)
     
     def finalize(self, status: str):
         """
         Mark run as complete.
+        Blocks until buffered steps are written; from async code use
+        finalize_async so the event loop isn't held up meanwhile.
         
         Args:
             status: Final status (completed or failed)
         """
+        self._flush_steps()
+        self._mark_finalized(status)
+    
+    async def finalize_async(self, status: str):
+        """
+        Mark run as complete, waiting for buffered steps off the event loop.
+        
+        Args:
+            status: Final status (completed or failed)
+        """
+        await asyncio.to_thread(self._flush_steps)
+        self._mark_finalized(status)
+    
+    def _flush_steps(self):
+        """Make sure every step is in the DB before the run is marked done."""
+        if self.writer and not self.writer.flush():
+            print(f"Warning: Timed out flushing steps of run {self.run.id}; they are still being written")
+    
+    def _mark_finalized(self, status: str):
         self.run.status = status
         self.run.completed_at = datetime.now()
+        
+        # Summary columns for the runs list
+        self.run.step_count = self.step_order
+        self.run.tool_call_count = sum(self.tool_counts.values())
+        if self.run.created_at:
+            elapsed = self.run.completed_at - self.run.created_at
+            self.run.duration_ms = int(elapsed.total_seconds() * 1000)
+        
+        # Rollups are updated in the run's session so they commit with its status
+        db = object_session(self.run)
+        if db is not None:
+            record_run_finalized(db, self.run, self.tool_counts)
+        else:
+            db = SessionLocal()
+            try:
+                record_run_finalized(db, self.run, self.tool_counts)
+                db.commit()
+            finally:
+                db.close()
+        
+        run_events.close(self.run.id, {
+            "status": status,
+            "completed_at": self.run.completed_at.isoformat()
+        })
+        self.closed = True
+    
+    def close(self):
+        """
+        End the live event stream of a run that was not finalized
+        (cancelled, or its caller failed). Safe to call more than once;
+        use in a finally or as a context manager.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        run_events.close(self.run.id, {"status": "interrupted", "completed_at": None})
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def get_step_count(self) -> int:
         """Get number of steps tracked so far"""
-        return len(self.run.steps)
+        return self.step_order
     
     def __repr__(self):
         return f"<RunTracker: run_id={self.run.id}, steps={self.step_order}>"
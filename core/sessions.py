@@ -0,0 +1,163 @@
+"""In-memory cache of chat session histories backed by the database"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from models.session import ChatSession, SessionMessage
+
+
+class SessionState:
+    """A loaded session: its recent history and a lock serializing turns."""
+
+    def __init__(self, session: ChatSession, history: List[Dict], next_seq: int):
+        self.id = session.id
+        self.model = session.model
+        self.tools = session.tools
+        self.history = history
+        self.next_seq = next_seq
+        self.lock = asyncio.Lock()
+        self.active_turns = 0  # turns running or waiting for the lock
+
+    @asynccontextmanager
+    async def turn(self):
+        """
+        Hold the session for one turn. Counted from before the wait for the
+        lock, so the state can't be evicted (and reloaded with a second
+        lock and seq counter) while a turn is queued on it.
+        """
+        self.active_turns += 1
+        try:
+            async with self.lock:
+                yield
+        finally:
+            self.active_turns -= 1
+
+
+class SessionStore:
+    """
+    Keeps up to max_sessions session histories in memory (LRU), each
+    bounded to the last max_messages messages. Evicted sessions are
+    reloaded lazily from the database on their next turn.
+    """
+
+    def __init__(self, max_sessions: int = None, max_messages: int = None):
+        """
+        Args:
+            max_sessions: Sessions kept in memory (defaults to SESSION_CACHE_SIZE or 256)
+            max_messages: History messages kept per session (defaults to
+                SESSION_MAX_MESSAGES or 100)
+        """
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_CACHE_SIZE", "256"))
+        self.max_messages = max_messages or int(os.getenv("SESSION_MAX_MESSAGES", "100"))
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, db: Session, model: str = None, tools: list = None) -> ChatSession:
+        """Create and persist an empty session."""
+        session = ChatSession(model=model, tools=tools)
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+
+        self._remember(SessionState(session, [], 0))
+        return session
+
+    def get(self, db: Session, session_id: str) -> Optional[SessionState]:
+        """Cached session state, loading it from the database on a miss."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+                return state
+
+        session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+        if session is None:
+            return None
+
+        rows = (
+            db.query(SessionMessage)
+            .filter(SessionMessage.session_id == session_id)
+            .order_by(SessionMessage.seq.desc())
+            .limit(self.max_messages)
+            .all()
+        )
+        rows.reverse()
+        history = self._trim([row.to_message() for row in rows])
+        next_seq = rows[-1].seq + 1 if rows else 0
+
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep that one (and its lock)
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session, history, next_seq)
+                self._remember_locked(state)
+            return state
+
+    def append(self, db: Session, state: SessionState, messages: List[Dict], run_id: str = None):
+        """Persist a turn's new messages and add them to the in-memory history."""
+        for message in messages:
+            db.add(SessionMessage(
+                session_id=state.id,
+                seq=state.next_seq,
+                role=message["role"],
+                content=message.get("content"),
+                tool_calls=message.get("tool_calls"),
+                tool_call_id=message.get("tool_call_id"),
+                run_id=run_id
+            ))
+            state.next_seq += 1
+
+        db.query(ChatSession).filter(ChatSession.id == state.id).update({
+            ChatSession.message_count: state.next_seq,
+            ChatSession.updated_at: datetime.now()
+        })
+        db.commit()
+
+        state.history = self._trim(state.history + messages)
+
+    def delete(self, db: Session, session_id: str) -> bool:
+        """Delete a session and its messages."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+        deleted = db.query(ChatSession).filter(ChatSession.id == session_id).delete()
+        db.execute(delete(SessionMessage).where(SessionMessage.session_id == session_id))
+        db.commit()
+        return bool(deleted)
+
+    def _trim(self, history: List[Dict]) -> List[Dict]:
+        """
+        Keep the last max_messages messages, starting at a user message so
+        no tool result is separated from the assistant call that produced it.
+        """
+        history = history[-self.max_messages:]
+        for i, message in enumerate(history):
+            if message["role"] == "user":
+                return history[i:]
+        return []
+
+    def _remember(self, state: SessionState):
+        with self._lock:
+            self._remember_locked(state)
+
+    def _remember_locked(self, state: SessionState):
+        self._sessions[state.id] = state
+        self._sessions.move_to_end(state.id)
+
+        # Evict least recently used sessions with no turn running or queued
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not self._sessions[session_id].active_turns:
+                del self._sessions[session_id]
+
+
+# Shared store for the process
+session_store = SessionStore()
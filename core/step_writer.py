@@ -0,0 +1,144 @@
+"""Write-behind persistence of run steps"""
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from models.database import SessionLocal
+from models.run import RunStep
+
+
+class StepWriter:
+    """
+    Buffers RunStep rows and bulk-inserts them from a background thread.
+    A batch is written when it reaches batch_size rows or when the oldest
+    buffered row is flush_interval seconds old, whichever comes first.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = None, flush_interval: float = None):
+        """
+        Initialize and start the writer thread.
+
+        Args:
+            session_factory: Callable returning a new DB session
+            batch_size: Rows per bulk insert (defaults to STEP_FLUSH_SIZE or 50)
+            flush_interval: Max seconds a row waits (defaults to STEP_FLUSH_INTERVAL or 0.5)
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size or int(os.getenv("STEP_FLUSH_SIZE", "50"))
+        self.flush_interval = flush_interval or float(os.getenv("STEP_FLUSH_INTERVAL", "0.5"))
+
+        self._queue: queue.Queue = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._worker, name="step-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: Dict[str, Any]):
+        """
+        Queue a step row for insertion. Never blocks.
+
+        Args:
+            row: Column values for a RunStep (id, run_id, type, content, timestamp, order)
+        """
+        self._queue.put(row)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Block until every row submitted so far has been written.
+
+        Returns:
+            bool: True if the flush completed within timeout
+        """
+        if self._stopped:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending rows and stop the writer thread."""
+        if self._stopped:
+            return
+        self.flush()
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+    def _worker(self):
+        buffer: List[Dict[str, Any]] = []
+        oldest = 0.0
+
+        while True:
+            timeout = None
+            if buffer:
+                timeout = max(0.0, oldest + self.flush_interval - time.monotonic())
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False  # Time threshold reached
+
+            if isinstance(item, dict):
+                if not buffer:
+                    oldest = time.monotonic()
+                buffer.append(item)
+                if len(buffer) < self.batch_size:
+                    continue
+
+            if buffer:
+                self._write(buffer)
+                buffer = []
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        """Bulk insert rows, falling back to row-by-row on failure."""
+        db = self.session_factory()
+        try:
+            db.execute(insert(RunStep), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Bulk step insert failed ({e}); retrying row by row")
+            for row in rows:
+                try:
+                    db.execute(insert(RunStep), [row])
+                    db.commit()
+                except Exception as row_error:
+                    db.rollback()
+                    print(f"Warning: Dropped step {row.get('id')}: {row_error}")
+        finally:
+            db.close()
+
+
+# Process-wide writer shared by all trackers
+_writer_instance: Optional[StepWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_step_writer() -> Optional[StepWriter]:
+    """
+    Get the shared StepWriter, or None if STEP_WRITE_BEHIND is disabled.
+    """
+    global _writer_instance
+    if os.getenv("STEP_WRITE_BEHIND", "true").lower() not in ("1", "true", "yes"):
+        return None
+
+    if _writer_instance is None:
+        with _writer_lock:
+            if _writer_instance is None:
+                _writer_instance = StepWriter()
+    return _writer_instance
+
+
+def close_step_writer():
+    """Flush and stop the shared writer (call on application shutdown)."""
+    global _writer_instance
+    with _writer_lock:
+        if _writer_instance is not None:
+            _writer_instance.close()
+            _writer_instance = None
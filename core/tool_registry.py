@@ -1,11 +1,87 @@
 """Dynamic tool discovery and execution"""
+import hashlib
 import importlib
 import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 from tools.base import BaseTool
 
 
+def _file_state(path: Path) -> Tuple[float, int, str]:
+    """Return (mtime, size, sha256) for a tool module file"""
+    stat = path.stat()
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    return stat.st_mtime, stat.st_size, digest
+
+
+class ToolResultCache:
+    """
+    Bounded LRU of results from cacheable tools, keyed by (tool name, cache key).
+    Tracks hit/miss counts globally and per tool.
+    """
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+    
+    def get(self, tool_name: str, key: str, ttl: Optional[float]) -> Tuple[bool, Any]:
+        """Return (found, result); expired entries count as misses."""
+        with self._lock:
+            entry = self._entries.get((tool_name, key))
+            if entry is not None:
+                stored_at, result = entry
+                if ttl is None or time.monotonic() - stored_at < ttl:
+                    self._entries.move_to_end((tool_name, key))
+                    self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+                    return True, result
+                del self._entries[(tool_name, key)]
+            self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+            return False, None
+    
+    def set(self, tool_name: str, key: str, result: Any):
+        with self._lock:
+            self._entries[(tool_name, key)] = (time.monotonic(), result)
+            self._entries.move_to_end((tool_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, tool_names: Iterable[str]):
+        """Drop cached results for tools whose code changed."""
+        names = set(tool_names)
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] in names]:
+                del self._entries[entry_key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Global and per-tool hit rates."""
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + sum(self.misses.values())
+            return {
+                "entries": len(self._entries),
+                "hits": hits,
+                "misses": total - hits,
+                "hit_rate": hits / total if total else 0.0,
+                "per_tool": {
+                    name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                    for name in set(self.hits) | set(self.misses)
+                }
+            }
+
+
+# Directory scanned for tool modules
+TOOLS_DIR = Path(__file__).parent.parent / "tools"
+SKIP_FILES = ["__init__.py", "base.py"]
+
+
 class ToolRegistry:
     """
     Discovers and manages all available tools.
@@ -14,44 +90,148 @@ class ToolRegistry:
     
     def __init__(self):
         self.tools: Dict[str, BaseTool] = {}
+        # Tool names contributed by each module, and (mtime, size, sha256) per module file
+        self._module_tools: Dict[str, List[str]] = {}
+        self._file_state: Dict[str, Tuple[float, int, str]] = {}
+        self.result_cache = ToolResultCache()
         self._discover_tools()
+        self._build_schemas()
+    
+    def _build_schemas(self):
+        """Precompute schemas; filtered subsets are cached per name set"""
+        self._schemas: Tuple[Dict[str, Any], ...] = tuple(
+            tool.get_schema() for tool in self.tools.values()
+        )
+        self._subset_cache: Dict[frozenset, Tuple[Dict[str, Any], ...]] = {}
     
     def _discover_tools(self):
         """
         Auto-discover all tools from tools/ directory.
         Looks for classes that inherit from BaseTool.
         """
-        tools_dir = Path(__file__).parent.parent / "tools"
-        
-        for file_path in tools_dir.glob("*.py"):
+        for file_path in TOOLS_DIR.glob("*.py"):
             # Skip __init__.py and base.py
-            if file_path.name in ["__init__.py", "base.py"]:
+            if file_path.name in SKIP_FILES:
                 continue
             
-            try:
-                # Import module
-                module_name = f"tools.{file_path.stem}"
+            self._file_state[file_path.stem] = _file_state(file_path)
+            self._load_module(file_path)
+    
+    def _load_module(self, file_path: Path, reload: bool = False):
+        """
+        Import (or re-import) one tool module and register its tools.
+        On failure the module's previously registered tools are kept.
+        """
+        module_name = f"tools.{file_path.stem}"
+        
+        try:
+            # Import module
+            if reload and module_name in sys.modules:
+                module = importlib.reload(sys.modules[module_name])
+            else:
                 module = importlib.import_module(module_name)
-                
-                # Find all classes in module
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    # Check if it's a BaseTool subclass (but not BaseTool itself)
-                    if issubclass(obj, BaseTool) and obj != BaseTool:
-                        # Instantiate and register tool
-                        tool_instance = obj()
-                        self.tools[tool_instance.name] = tool_instance
-                        
-            except Exception as e:
-                print(f"Warning: Failed to load tool from {file_path.name}: {e}")
+            
+            # Find all classes defined in module
+            instances = []
+            for name, obj in inspect.getmembers(module, inspect.isclass):
+                # Check if it's a BaseTool subclass (but not BaseTool itself)
+                if issubclass(obj, BaseTool) and obj != BaseTool and obj.__module__ == module_name:
+                    instances.append(obj())
+                    
+        except Exception as e:
+            print(f"Warning: Failed to load tool from {file_path.name}: {e}")
+            return
+        
+        # Replace whatever this module registered before
+        self._unload_module(file_path.stem)
+        for tool_instance in instances:
+            self.tools[tool_instance.name] = tool_instance
+        self._module_tools[file_path.stem] = [tool.name for tool in instances]
+    
+    def _unload_module(self, stem: str):
+        """Drop all tools registered by a module"""
+        for tool_name in self._module_tools.pop(stem, []):
+            self.tools.pop(tool_name, None)
+    
+    def reload_changed(self) -> Optional["ToolRegistry"]:
+        """
+        Check tools/ for added, modified or deleted modules.
+        Only files whose content hash changed are re-imported.
+        
+        Returns:
+            ToolRegistry: A new registry with the changes applied,
+                or None if nothing changed. Tools on self are never mutated.
+        """
+        current = {
+            path.stem: path
+            for path in TOOLS_DIR.glob("*.py")
+            if path.name not in SKIP_FILES
+        }
+        
+        file_state = dict(self._file_state)
+        changed = []
+        for stem, path in current.items():
+            old = file_state.get(stem)
+            stat = path.stat()
+            if old and old[0] == stat.st_mtime and old[1] == stat.st_size:
+                continue
+            
+            state = _file_state(path)
+            file_state[stem] = state
+            if not old or old[2] != state[2]:
+                changed.append(path)
+        
+        removed = [stem for stem in self._module_tools if stem not in current]
+        
+        if not changed and not removed:
+            # Only touch-level changes; remember the new mtimes
+            self._file_state = file_state
+            return None
+        
+        registry = ToolRegistry.__new__(ToolRegistry)
+        registry.tools = dict(self.tools)
+        registry._module_tools = dict(self._module_tools)
+        registry._file_state = file_state
+        registry.result_cache = self.result_cache
+        
+        # Results from old code must not outlive it
+        stale = [name for stem in removed + [p.stem for p in changed] for name in self._module_tools.get(stem, [])]
+        
+        for stem in removed:
+            registry._unload_module(stem)
+            registry._file_state.pop(stem, None)
+        # Finders cache directory listings; without this new files may not import
+        importlib.invalidate_caches()
+        for path in changed:
+            registry._load_module(path, reload=True)
+        
+        registry.result_cache.invalidate(stale)
+        
+        registry._build_schemas()
+        return registry
     
-    def get_schemas(self) -> List[Dict[str, Any]]:
+    def get_schemas(self, names: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], ...]:
         """
-        Get all tool schemas for OpenAI function calling.
+        Get tool schemas for OpenAI function calling.
+        Schemas are precomputed; treat the returned tuple as read-only.
         
+        Args:
+            names: Optional tool names to restrict the result to
+            
         Returns:
-            list: List of OpenAI-compatible tool schemas
+            tuple: OpenAI-compatible tool schemas
         """
-        return [tool.get_schema() for tool in self.tools.values()]
+        if names is None:
+            return self._schemas
+        
+        # Only known names form the key, so client input can't grow the cache
+        # beyond one entry per subset of registered tools
+        key = frozenset(name for name in names if name in self.tools)
+        subset = self._subset_cache.get(key)
+        if subset is None:
+            subset = tuple(s for s in self._schemas if s['function']['name'] in key)
+            self._subset_cache[key] = subset
+        return subset
     
     def execute(self, tool_name: str, **params) -> Any:
         """
@@ -74,7 +254,17 @@ class ToolRegistry:
                 f"Available tools: {available_tools}"
             )
         
-        return self.tools[tool_name].execute(**params)
+        tool = self.tools[tool_name]
+        if not tool.cacheable:
+            return tool.execute(**params)
+        
+        # Pure tools: serve repeated calls from the LRU
+        key = tool.cache_key(**params)
+        found, result = self.result_cache.get(tool_name, key, tool.cache_ttl)
+        if not found:
+            result = tool.execute(**params)
+            self.result_cache.set(tool_name, key, result)
+        return result
     
     def get_tool(self, tool_name: str) -> BaseTool:
         """
@@ -116,3 +306,63 @@ class ToolRegistry:
     def __repr__(self):
         return f"<ToolRegistry: {len(self.tools)} tools>"
 
+
+
+# Process-wide registry so requests never pay for discovery
+_registry_instance: Optional[ToolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ToolRegistry:
+    """Get the shared ToolRegistry, discovering tools on first use."""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = ToolRegistry()
+    return _registry_instance
+
+
+def reload_registry() -> bool:
+    """
+    Re-import changed tool modules and atomically swap the shared registry.
+    In-flight runs keep the registry instance they started with.
+    
+    Returns:
+        bool: True if the registry was replaced
+    """
+    global _registry_instance
+    with _registry_lock:
+        if _registry_instance is None:
+            _registry_instance = ToolRegistry()
+            return True
+        
+        updated = _registry_instance.reload_changed()
+        if updated is None:
+            return False
+        
+        _registry_instance = updated
+        print(f"Tool registry reloaded: {len(updated)} tools")
+        return True
+
+
+def start_tool_watcher(interval: float = None) -> threading.Thread:
+    """
+    Start a daemon thread that polls tools/ and hot-reloads changed modules.
+    
+    Args:
+        interval: Seconds between checks (defaults to TOOLS_RELOAD_INTERVAL or 2)
+    """
+    interval = interval or float(os.getenv("TOOLS_RELOAD_INTERVAL", "2"))
+    
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_registry()
+            except Exception as e:
+                print(f"Warning: Tool hot-reload failed: {e}")
+    
+    thread = threading.Thread(target=watch, name="tool-watcher", daemon=True)
+    thread.start()
+    return thread
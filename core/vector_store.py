@@ -0,0 +1,374 @@
+"""
+Pluggable vector store backends for the knowledge base.
+
+- chroma: LangChain + ChromaDB (default)
+- numpy:  normalized float32 embeddings in a memory-mapped matrix plus a
+          JSON metadata sidecar. No database dependency, instant startup,
+          and several worker processes can share one on-disk index through
+          the OS page cache (single writer, many readers).
+"""
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class SearchResult:
+    """Minimal stand-in for a LangChain Document."""
+
+    __slots__ = ("page_content", "metadata", "score")
+
+    def __init__(self, page_content: str, metadata: Dict[str, Any], score: float = None):
+        self.page_content = page_content
+        self.metadata = metadata
+        self.score = score
+
+
+class VectorStore(ABC):
+    """Operations the knowledge base needs from a vector store."""
+
+    @abstractmethod
+    def add_texts(self, texts: List[str], metadatas: List[dict], ids: List[str]):
+        """Embed and store texts under the given ids (replacing existing ids)."""
+
+    @abstractmethod
+    def delete(self, ids: Iterable[str]):
+        """Remove entries by id."""
+
+    @abstractmethod
+    def get_ids(self, source: str) -> List[str]:
+        """Ids of all entries whose metadata source equals source."""
+
+    @abstractmethod
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> list:
+        """Top-k entries by similarity; items expose page_content and metadata."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored entries."""
+
+    def persist(self):
+        """Flush to disk (no-op for stores that write through)."""
+
+    def reset(self):
+        """Forget in-memory state after the persist directory was removed."""
+
+    def version(self):
+        """
+        Token that changes whenever persisted contents change, including
+        writes by other processes (None if the store can't tell).
+        """
+        return None
+
+
+class ChromaVectorStore(VectorStore):
+    """Adapter over LangChain's Chroma vector store."""
+
+    def __init__(self, embeddings, persist_directory: str):
+        from langchain_community.vectorstores import Chroma
+
+        self.db = Chroma(
+            persist_directory=persist_directory,
+            embedding_function=embeddings
+        )
+
+    def add_texts(self, texts, metadatas, ids):
+        self.db.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+
+    def delete(self, ids):
+        self.db.delete(ids=list(ids))
+
+    def get_ids(self, source):
+        return self.db.get(where={"source": source})["ids"]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        return self.db.similarity_search_by_vector(embedding, k=k)
+
+    def count(self):
+        return self.db._collection.count()
+
+    def persist(self):
+        self.db.persist()
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Memory-mapped float32 index.
+
+    Layout in directory:
+        vectors*.f32 - row-major (capacity x dim) matrix of unit vectors
+        meta.json    - dim, the current vectors file name and per-row
+                       id/text/metadata (null marks a deleted row,
+                       dropped by compaction)
+
+    Rows appended since the last persist() are invisible to other
+    processes; persist() flushes the matrix then atomically replaces
+    meta.json, and readers reload when it changes. Rows a published
+    meta.json points at are never rewritten in place: compaction writes
+    a new vectors file that the next meta.json switches to.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+
+    def __init__(self, embeddings, directory: str):
+        import numpy as np
+
+        self.np = np
+        self.embeddings = embeddings
+        self.directory = directory
+        self._lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self._vectors = None  # np.memmap, or None while empty
+        self._capacity = 0
+        self._rows: List[Optional[dict]] = []  # {"id", "text", "metadata"} or None if deleted
+        self._index: Dict[str, int] = {}
+        self._vectors_file = self.VECTORS_FILE
+        self._retired_file = None  # replaced by compaction, removed once meta.json moves on
+        self._meta_version = None
+        self._load()
+
+    # --- VectorStore API ---
+
+    def add_texts(self, texts, metadatas, ids):
+        if not texts:
+            return
+        vectors = self._normalize(self.embeddings.embed_documents(list(texts)))
+
+        with self._lock:
+            self._ensure_matrix(vectors.shape[1], len(self._rows) + len(texts))
+            for vector, text, metadata, row_id in zip(vectors, texts, metadatas, ids):
+                row = self._index.get(row_id)
+                if row is None:
+                    row = len(self._rows)
+                    self._rows.append(None)
+                    self._index[row_id] = row
+                self._vectors[row] = vector
+                self._rows[row] = {"id": row_id, "text": text, "metadata": metadata or {}}
+
+    def delete(self, ids):
+        with self._lock:
+            for row_id in ids:
+                row = self._index.pop(row_id, None)
+                if row is not None:
+                    # Only the row entry: readers on the previous meta.json still use the vector
+                    self._rows[row] = None
+
+    def get_ids(self, source):
+        with self._lock:
+            return [r["id"] for r in self._rows if r is not None and r["metadata"].get("source") == source]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        np = self.np
+        self._reload_if_changed()
+
+        with self._lock:
+            n = len(self._rows)
+            if n == 0 or self._vectors is None:
+                return []
+            matrix = self._vectors[:n]
+            rows = list(self._rows)
+
+        query = self._normalize([embedding])[0]
+        scores = matrix @ query  # cosine similarity: all rows are unit vectors
+        live = np.fromiter((r is not None for r in rows), dtype=bool, count=n)
+        scores = np.where(live, scores, -np.inf)
+
+        k = min(k, int(live.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            SearchResult(rows[i]["text"], rows[i]["metadata"], float(scores[i]))
+            for i in top
+        ]
+
+    def count(self):
+        with self._lock:
+            return len(self._index)
+
+    def persist(self):
+        with self._lock:
+            # Compact when over a quarter of the rows are tombstones
+            if self._rows and len(self._index) < 0.75 * len(self._rows):
+                self._compact()
+
+            if self._vectors is not None:
+                self._vectors.flush()
+
+            os.makedirs(self.directory, exist_ok=True)
+            meta = {"dim": self.dim, "vectors_file": self._vectors_file, "rows": self._rows}
+            path = os.path.join(self.directory, self.META_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, path)
+            self._meta_version = self._stat_meta()
+
+            if self._retired_file:
+                # Readers still mapping it keep their pages until they reload
+                try:
+                    os.remove(os.path.join(self.directory, self._retired_file))
+                except FileNotFoundError:
+                    pass
+                self._retired_file = None
+
+    def reset(self):
+        with self._lock:
+            self.dim = None
+            self._vectors = None
+            self._capacity = 0
+            self._rows = []
+            self._index = {}
+            self._vectors_file = self.VECTORS_FILE
+            self._retired_file = None
+            self._meta_version = None
+
+    def version(self):
+        return self._stat_meta()
+
+    # --- internals ---
+
+    def _normalize(self, vectors):
+        np = self.np
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _vectors_path(self):
+        return os.path.join(self.directory, self._vectors_file)
+
+    def _open_matrix(self, mode: str):
+        np = self.np
+        size = os.path.getsize(self._vectors_path())
+        self._capacity = size // (4 * self.dim)
+        self._vectors = np.memmap(self._vectors_path(), dtype=np.float32, mode=mode, shape=(self._capacity, self.dim))
+
+    def _ensure_matrix(self, dim: int, rows_needed: int):
+        """Create or grow (by doubling) the backing file."""
+        np = self.np
+        if self.dim is None:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self.dim}")
+
+        if rows_needed <= self._capacity:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        capacity = max(rows_needed, 2 * self._capacity, 1024)
+        old, old_rows = self._vectors, len(self._rows)
+
+        tmp_path = self._vectors_path() + ".tmp"
+        grown = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=(capacity, dim))
+        if old is not None and old_rows:
+            grown[:old_rows] = old[:old_rows]
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self._vectors_path())
+        self._open_matrix("r+")
+
+    def _compact(self):
+        """
+        Drop deleted rows into a new vectors file. The current file stays
+        intact for readers until persist() publishes meta.json pointing at
+        the new one.
+        """
+        np = self.np
+        keep = [i for i, r in enumerate(self._rows) if r is not None]
+        capacity = max(len(keep), 1024)
+        name = f"vectors-{time.time_ns()}.f32"
+
+        compacted = np.memmap(os.path.join(self.directory, name), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        if keep:
+            compacted[:len(keep)] = self._vectors[keep]
+        compacted.flush()
+        del compacted
+
+        if self._retired_file is None and self._vectors_file != name:
+            self._retired_file = self._vectors_file
+        self._vectors_file = name
+        self._rows = [self._rows[i] for i in keep]
+        self._index = {r["id"]: i for i, r in enumerate(self._rows)}
+        self._open_matrix("r+")
+
+    def _load(self):
+        """Open an existing index from disk (if any)."""
+        path = os.path.join(self.directory, self.META_FILE)
+        if not os.path.exists(path):
+            return
+
+        # Stat first: if meta.json is replaced while we read, the next check reloads again
+        version = self._stat_meta()
+        with open(path) as f:
+            meta = json.load(f)
+
+        self.dim = meta["dim"]
+        self._rows = meta["rows"]
+        self._vectors_file = meta.get("vectors_file", self.VECTORS_FILE)
+        self._index = {r["id"]: i for i, r in enumerate(self._rows) if r is not None}
+        self._meta_version = version
+        self._vectors = None
+        self._capacity = 0
+        if self.dim is not None:
+            try:
+                self._open_matrix("r+")
+            except FileNotFoundError:
+                # Compacted away by a writer since we read meta.json; retry next time
+                self._meta_version = None
+
+    def _stat_meta(self):
+        """(mtime_ns, size, inode) of meta.json, or None if there is none yet."""
+        try:
+            stat = os.stat(os.path.join(self.directory, self.META_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _reload_if_changed(self):
+        """Pick up an index persisted by another process."""
+        version = self._stat_meta()
+        if version is not None and version != self._meta_version:
+            with self._lock:
+                if version != self._meta_version:
+                    self._load()
+
+
+class SentenceTransformerEmbeddings:
+    """
+    LangChain-compatible embeddings straight from sentence-transformers,
+    so the numpy backend doesn't need to import LangChain at startup.
+    """
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=64).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text).tolist()
+
+
+def create_vector_store(backend: str, embeddings, persist_directory: str) -> VectorStore:
+    """
+    Build the configured vector store.
+
+    Args:
+        backend: "chroma" or "numpy"
+        embeddings: Embeddings object (embed_documents/embed_query)
+        persist_directory: Knowledge base directory
+    """
+    if backend == "numpy":
+        return NumpyVectorStore(embeddings, os.path.join(persist_directory, "numpy_index"))
+    if backend == "chroma":
+        return ChromaVectorStore(embeddings, persist_directory)
+    raise ValueError(f"Unknown vector store backend '{backend}' (expected 'chroma' or 'numpy')")
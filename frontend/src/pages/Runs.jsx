@@ -130,12 +130,45 @@ export const Runs = () => {
     }, []);
 
     useEffect(() => {
-        if (selectedRunId) {
-            fetch(`${API_URL}/runs/${selectedRunId}`)
-                .then(r => r.json())
-                .then(setRunDetails)
-                .catch(console.error);
-        }
+        if (!selectedRunId) return;
+
+        let source = null;
+        let cancelled = false;
+
+        fetch(`${API_URL}/runs/${selectedRunId}`)
+            .then(r => r.json())
+            .then(details => {
+                if (cancelled) return;
+                setRunDetails(details);
+                if (details.status !== 'running') return;
+
+                // Live run: receive new steps as they happen instead of refetching
+                const lastOrder = details.steps.length > 0 ? details.steps[details.steps.length - 1].order : -1;
+                source = new EventSource(`${API_URL}/runs/${selectedRunId}/events?after=${lastOrder}`);
+                source.addEventListener('step', e => {
+                    const step = JSON.parse(e.data);
+                    setRunDetails(prev => prev && prev.id === selectedRunId
+                        ? { ...prev, steps: [...prev.steps, step] }
+                        : prev);
+                });
+                source.addEventListener('status', e => {
+                    const { status, completed_at } = JSON.parse(e.data);
+                    setRunDetails(prev => prev && prev.id === selectedRunId
+                        ? { ...prev, status, completed_at }
+                        : prev);
+                    setRuns(prev => prev.map(run => run.id === selectedRunId
+                        ? { ...run, status: status.charAt(0).toUpperCase() + status.slice(1) }
+                        : run));
+                    source.close();
+                });
+                source.onerror = () => source.close();
+            })
+            .catch(console.error);
+
+        return () => {
+            cancelled = true;
+            if (source) source.close();
+        };
     }, [selectedRunId]);
 
     const renderStep = (step, index, total) => {
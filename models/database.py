@@ -1,5 +1,5 @@
 """Database configuration and session management"""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -39,4 +39,29 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    _sync_schema()
+
+
+def _sync_schema():
+    """
+    Additive schema sync for databases created by older versions.
+    create_all() never alters existing tables, so add any missing
+    columns and indexes declared on the models.
+    """
+    inspector = inspect(engine)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+        
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
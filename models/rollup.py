@@ -0,0 +1,31 @@
+"""Incrementally maintained run rollups for stats and time series"""
+from sqlalchemy import Column, String, Integer
+from models.database import Base
+
+# Bucket value for all-time totals; time buckets are hour-truncated ISO strings
+TOTAL_BUCKET = "total"
+
+
+class RunRollup(Base):
+    """
+    Run counters per (bucket, dimension, key).
+    Dimensions: status (running/completed/failed), model, tool.
+    Powers the dashboard without scanning the runs table.
+    """
+    __tablename__ = "run_rollups"
+    
+    bucket = Column(String, primary_key=True)  # "total" or e.g. "2026-01-01T13:00"
+    dimension = Column(String, primary_key=True)  # status, model, tool
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    duration_ms = Column(Integer, nullable=False, default=0)  # Summed over finished runs
+    
+    def to_dict(self):
+        """Convert to dict for API responses"""
+        return {
+            "bucket": self.bucket,
+            "dimension": self.dimension,
+            "key": self.key,
+            "count": self.count,
+            "duration_ms": self.duration_ms
+        }
@@ -1,5 +1,5 @@
 """Run and RunStep models for execution tracking"""
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON, Index
 from sqlalchemy.orm import relationship
 from models.database import Base
 import uuid
@@ -15,19 +15,34 @@ class Run(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_query = Column(String, nullable=False)
-    status = Column(String, default="running")  # running, completed, failed
+    status = Column(String, default="running")  # queued, running, completed, failed
+    model = Column(String, nullable=True)  # Backend model ID
+    session_id = Column(String, nullable=True)  # Chat session the run belongs to, if any
     created_at = Column(DateTime, default=datetime.now)
     completed_at = Column(DateTime, nullable=True)
     
+    # Denormalized summary, filled in by RunTracker.finalize so lists never touch run_steps
+    step_count = Column(Integer, nullable=True)
+    tool_call_count = Column(Integer, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    
     # Relationships
     steps = relationship("RunStep", back_populates="run", order_by="RunStep.order", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), optionally filtered by status
+        Index("ix_runs_created_at_id", "created_at", "id"),
+        Index("ix_runs_status_created_at_id", "status", "created_at", "id"),
+    )
+    
     def to_dict(self):
         """Convert to dict for API responses"""
         return {
             "id": self.id,
             "user_query": self.user_query,
             "status": self.status,
+            "model": self.model,
+            "session_id": self.session_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "steps": [step.to_dict() for step in self.steps]
@@ -40,7 +55,10 @@ class Run(Base):
             "name": f"Run {self.id[:8]}",
             "time": self.created_at.strftime("%I:%M %p") if self.created_at else "",
             "status": self.status.capitalize(),
-            "user_query": self.user_query
+            "user_query": self.user_query,
+            "step_count": self.step_count,
+            "tool_call_count": self.tool_call_count,
+            "duration_ms": self.duration_ms
         }
 
 
@@ -61,6 +79,10 @@ class RunStep(Base):
     # Relationships
     run = relationship("Run", back_populates="steps")
     
+    __table_args__ = (
+        Index("ix_run_steps_run_id_order", "run_id", "order"),
+    )
+    
     def to_dict(self):
         """Convert to dict for API responses"""
         return {
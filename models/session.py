@@ -0,0 +1,71 @@
+"""Chat session models for multi-turn conversations"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON, Text, Index
+from models.database import Base
+import uuid
+from datetime import datetime
+
+
+class ChatSession(Base):
+    """
+    A server-side conversation. Each turn runs the agent with the stored
+    history and appends the new messages.
+    """
+    __tablename__ = "chat_sessions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    model = Column(String, nullable=True)  # Backend model ID used by default for turns
+    tools = Column(JSON, nullable=True)  # Default allowed tools for turns
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)
+
+    def to_dict(self):
+        """Convert to dict for API responses"""
+        return {
+            "id": self.id,
+            "model": self.model,
+            "tools": self.tools,
+            "message_count": self.message_count,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class SessionMessage(Base):
+    """
+    One message of a session in OpenAI chat format (user, assistant, tool).
+    Append-only; the system prompt is not stored.
+    """
+    __tablename__ = "session_messages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)  # Position in the conversation
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=True)
+    tool_calls = Column(JSON, nullable=True)
+    tool_call_id = Column(String, nullable=True)
+    run_id = Column(String, nullable=True)  # Run that produced the message
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_session_messages_session_id_seq", "session_id", "seq", unique=True),
+    )
+
+    def to_message(self):
+        """Convert to an LLM chat message"""
+        message = {"role": self.role, "content": self.content or ""}
+        if self.tool_calls:
+            message["tool_calls"] = self.tool_calls
+        if self.tool_call_id:
+            message["tool_call_id"] = self.tool_call_id
+        return message
+
+    def to_dict(self):
+        """Convert to dict for API responses"""
+        return {
+            "seq": self.seq,
+            "run_id": self.run_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            **self.to_message()
+        }
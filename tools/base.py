@@ -1,6 +1,7 @@
 """Base class for all agent tools"""
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class BaseTool(ABC):
@@ -15,6 +16,10 @@ class BaseTool(ABC):
     description: str = "What this tool does"
     icon: str = "IconTool"  # Icon name for frontend
     
+    # Memoization (override in pure, deterministic tools)
+    cacheable: bool = False  # Results may be served from the registry's cache
+    cache_ttl: Optional[float] = None  # Seconds a cached result stays valid (None = no expiry)
+    
     @abstractmethod
     def execute(self, **kwargs) -> Any:
         """
@@ -40,6 +45,19 @@ class BaseTool(ABC):
         """
         raise NotImplementedError("Tool must implement get_parameters() method")
     
+    def cache_key(self, **kwargs) -> str:
+        """
+        Key identifying a call for memoization.
+        Override if some parameters don't affect the result.
+        
+        Args:
+            **kwargs: Tool-specific parameters
+            
+        Returns:
+            str: Canonical key for these parameters
+        """
+        return json.dumps(kwargs, sort_keys=True, default=str)
+    
     def get_schema(self) -> Dict[str, Any]:
         """
         Returns OpenAI function calling schema.
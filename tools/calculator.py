@@ -9,6 +9,7 @@ class CalculatorTool(BaseTool):
     display_name = "Calculator"
     description = "Performs basic arithmetic operations: add, multiply, subtract, divide, power"
     icon = "IconCalculator"
+    cacheable = True  # Pure function of its arguments
     
     def get_parameters(self):
         """Define calculator parameters"""
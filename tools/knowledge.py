@@ -1,17 +1,47 @@
 """
 Tools for interacting with the Agent's Personal Knowledge Base (RAG).
 """
+import os
 from tools.base import BaseTool
-from core.knowledge_base import KnowledgeBase
+# The shared instance lives in core so hot-reloading this module keeps it
+from core.knowledge_base import get_kb
+from core.ingest_jobs import ingest_jobs, QueueFullError
 
-# Singleton instance to share DB connection across tool calls
-_kb_instance = None
 
-def get_kb():
-    global _kb_instance
-    if _kb_instance is None:
-        _kb_instance = KnowledgeBase()
-    return _kb_instance
+def background_ingest() -> bool:
+    """Whether remember_* tools queue jobs instead of ingesting inline."""
+    return os.getenv("KB_BACKGROUND_INGEST", "true").lower() in ("1", "true", "yes")
+
+
+def queue_ingest(kind: str, path: str):
+    """
+    Queue a background ingestion of a file or directory/glob.
+    
+    Raises:
+        ValueError: If kind is not file or directory
+        QueueFullError: If the job queue is full
+    """
+    if kind == "directory":
+        work = lambda progress: get_kb().add_directory(path, progress=progress)
+    elif kind == "file":
+        work = lambda progress: get_kb().add_document(path, progress=progress)
+    else:
+        raise ValueError("kind must be 'file' or 'directory'")
+    return ingest_jobs.submit(kind, path, work)
+
+
+def submit_ingest(kind: str, path: str) -> str:
+    """Queue an ingestion job and return the agent-facing message."""
+    try:
+        job = queue_ingest(kind, path)
+    except QueueFullError as e:
+        return f"Error: {e}. Try again later."
+    
+    return (
+        f"Queued ingestion of '{path}' (job id: {job.id}). "
+        f"It runs in the background; call check_ingestion with this job id to see progress."
+    )
+
 
 class RememberTool(BaseTool):
     """Tool to ingest documents into the knowledge base."""
@@ -34,10 +64,75 @@ class RememberTool(BaseTool):
         }
     
     def execute(self, file_path: str) -> str:
+        if background_ingest():
+            return submit_ingest("file", file_path)
         kb = get_kb()
         return kb.add_document(file_path)
 
 
+class RememberDirectoryTool(BaseTool):
+    """Tool to bulk-ingest a directory of documents into the knowledge base."""
+    
+    name = "remember_directory"
+    display_name = "Remember Directory"
+    description = (
+        "Reads every PDF, TXT and MD file in a directory (recursively) or matching a glob pattern "
+        "and stores them in your long-term memory. Unchanged files are skipped."
+    )
+    icon = "IconDatabase"
+    
+    def get_parameters(self):
+        return {
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "Absolute directory path or glob pattern (e.g. /data/docs/**/*.pdf)"
+                }
+            },
+            "required": ["path"]
+        }
+    
+    def execute(self, path: str) -> str:
+        if background_ingest():
+            return submit_ingest("directory", path)
+        kb = get_kb()
+        return kb.add_directory(path)
+
+
+class CheckIngestionTool(BaseTool):
+    """Tool to check on a background ingestion job."""
+    
+    name = "check_ingestion"
+    display_name = "Check Ingestion"
+    description = "Checks the status and progress of a background remember_file/remember_directory job."
+    icon = "IconDatabase"
+    
+    def get_parameters(self):
+        return {
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job id returned when the ingestion was queued"
+                }
+            },
+            "required": ["job_id"]
+        }
+    
+    def execute(self, job_id: str) -> str:
+        job = ingest_jobs.get(job_id)
+        if job is None:
+            return f"Error: No ingestion job with id '{job_id}'."
+        
+        message = f"Job {job.id} ({job.kind} '{job.path}'): {job.status}"
+        if job.total:
+            message += f", {job.done}/{job.total} files processed"
+        if job.result:
+            message += f". Result: {job.result}"
+        return message
+
+
 class RecallTool(BaseTool):
     """Tool to search the knowledge base."""
     